@@ -0,0 +1,165 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+"""
+报告生成基准测试 (Report generation benchmark)
+
+Builds a synthetic session in-process, renders it with ``generate_html_report``
+and prints the peak RSS of the process. Every mode runs in its own child
+process, so the numbers do not leak into each other.
+
+    python bench_report.py                       # 50k scenarios, all modes
+    python bench_report.py --scenarios 5000 --modes stream
+"""
+import argparse
+import base64
+import io
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import conftest  # noqa: E402
+
+MODES = {
+    "render": {"stream": False},
+    "stream": {"stream": True},
+    "assets": {"stream": True, "assets": True},
+    "sqlite": {"stream": True, "assets": True, "db_path": "report.sqlite"},
+    "spool": {"stream": True, "spool": True, "spool_threshold": 256},
+    "parallel": {"stream": True, "assets": True, "db_path": "report.sqlite", "render_jobs": 0},
+}
+
+
+def _peak_rss_mb():
+    # Linux 上 ru_maxrss 单位是 KB, macOS 上是 bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak /= 1024
+    return peak / 1024
+
+
+def _fake_png():
+    # 随机噪点图，保证每张截图内容不同 (未安装 Pillow 时直接用随机字节)
+    if conftest.Image is None:
+        return os.urandom(6000)
+    buffer = io.BytesIO()
+    conftest.Image.frombytes("RGB", (48, 42), os.urandom(48 * 42 * 3)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _fake_report(i, features, fail_rate, clock=None):
+    feature = f"{(i % features) + 1}.1. Synthetic Feature {i % features}"
+    failed = random.random() < fail_rate
+    steps = [
+        {
+            "keyword": kw,
+            "name": f"step {kw.lower()} number {i % 50}",
+            "status": "passed",
+            "start": round(n_step * 1.5, 4),
+            "duration": round(random.uniform(0.05, 1.5), 4),
+            "logs": [[time.time(), "INFO", f"Step {kw} log line {n} for scenario {i}"] for n in range(3)],
+        }
+        for n_step, kw in enumerate(("Given", "When", "Then"))
+    ]
+    longrepr = None
+    screenshot = None
+    if failed:
+        steps[-1]["status"] = "failed"
+        steps[-1]["error"] = "AssertionError: price mismatch"
+        longrepr = "\n".join(f"tests/step_defs/test_furniture_steps.py:{n}: in verify\n    assert prices == sorted(prices)"
+                             for n in range(20))
+        screenshot = base64.b64encode(_fake_png()).decode("utf-8")
+    screenshot_url = screenshot_thumb = None
+    if screenshot and conftest.report_options["assets"]:
+        screenshot_url, screenshot_thumb = conftest._store_screenshot(screenshot)
+        screenshot = None
+    logs_spool = screenshot_spool = None
+    if conftest.report_options["spool"]:
+        steps, logs_spool, screenshot, screenshot_spool = conftest._spool_payload(steps, screenshot)
+    # 模拟 8 个 xdist worker 依次执行，各自维护一个时钟
+    worker = f"gw{i % 8}"
+    duration = random.uniform(0.1, 5.0)
+    start = (clock or {}).get(worker, 1_700_000_000.0)
+    if clock is not None:
+        clock[worker] = start + duration
+    return SimpleNamespace(
+        nodeid=f"tests/step_defs/test_synthetic.py::test_scenario_{i}",
+        when="call",
+        outcome="failed" if failed else "passed",
+        longrepr=longrepr,
+        sections=[("Captured log call", f"INFO root: synthetic scenario {i} finished")],
+        duration=duration,
+        extra_phase=[start, start + duration],
+        extra_worker=worker,
+        extra_fixtures=[["page", "function", round(random.uniform(0.2, 0.6), 4)],
+                        ["context", "function", round(random.uniform(0.05, 0.2), 4)]]
+        + ([["browser", "session", 2.5]] if i < 8 else []),
+        feature_name=feature,
+        scenario_name=f"{i}. Synthetic scenario {i}",
+        extra_screenshot=screenshot,
+        extra_screenshot_url=screenshot_url,
+        extra_screenshot_thumb=screenshot_thumb,
+        extra_screenshot_spool=screenshot_spool,
+        extra_steps=steps,
+        extra_logs_spool=logs_spool,
+        extra_markers=["p1", "smoke"] if i % 3 else ["p3"],
+    )
+
+
+def build_session(scenarios, features=200, fail_rate=0.05):
+    random.seed(1234)
+    data = conftest.TestSessionReport(db_path=conftest.report_options["db_path"])
+    clock = {}
+    for i in range(scenarios):
+        report = _fake_report(i, features, fail_rate, clock)
+        data.record_phase(report)
+        data.add_result(report)
+    conftest._drain_screenshot_jobs()
+    data.finalize()
+    return data
+
+
+def run_child(mode, scenarios):
+    with tempfile.TemporaryDirectory() as out_dir:
+        path = os.path.join(out_dir, "report.html")
+        conftest.report_options.update(MODES[mode], report_path=path)
+        if conftest.report_options.get("db_path"):
+            conftest.report_options["db_path"] = os.path.join(out_dir, conftest.report_options["db_path"])
+        data = build_session(scenarios)
+        rss_before = _peak_rss_mb()
+        started = time.perf_counter()
+        conftest.generate_html_report(data, output_path=path)
+        elapsed = time.perf_counter() - started
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        # 分页报告 (超过 split_threshold) 还要加上各 Feature 页
+        pages_dir = os.path.splitext(path)[0] + "-pages"
+        if os.path.isdir(pages_dir):
+            size_mb += sum(entry.stat().st_size for entry in os.scandir(pages_dir)) / 1024 / 1024
+    print(f"{mode:<10} scenarios={scenarios:<7} data_rss={rss_before:8.1f}MB "
+          f"peak_rss={_peak_rss_mb():8.1f}MB render={elapsed:6.2f}s report={size_mb:7.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=int, default=50000)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.scenarios)
+        return
+
+    for mode in args.modes:
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode,
+                        "--scenarios", str(args.scenarios)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,31 @@ import time
 import sys
 import platform
 import base64
+import hashlib
+import io
 import logging
+import threading
 import re
+import json
+import math
+import functools
+import heapq
+import collections
+import array
+import gzip
+import shutil
+import tempfile
+import zlib
+import sqlite3
+import statistics
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from jinja2 import Environment
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 为可选依赖，仅用于截图转码
+    Image = None
 
 
 # ===========================
@@ -15,20 +36,49 @@ from jinja2 import Environment
 # ===========================
 
 class StepLogHandler(logging.Handler):
-    def __init__(self):
+    """
+    只在 BDD 步骤执行期间采集日志，每个 nodeid 一个有界环形缓冲区。
+    保存原始 LogRecord，格式化推迟到生成报告时；超出上限的最早几行只计数。
+    """
+
+    def __init__(self, capacity=200):
         super().__init__()
-        self.records = []
-        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S'))
+        self.capacity = capacity
+        self._active = None
+        self._buffers = {}
+        self._elided = {}
 
-    def emit(self, record):
-        try:
-            msg = self.format(record)
-            self.records.append(msg)
-        except Exception:
-            self.handleError(record)
+    def handle(self, record):
+        # 步骤之外的日志直接丢弃，不加锁也不格式化
+        if self._active is None:
+            return False
+        return super().handle(record)
 
-    def reset(self):
-        self.records = []
+    def emit(self, record):
+        nodeid = self._active
+        buffer = self._buffers.get(nodeid)
+        if buffer is None:
+            return
+        if len(buffer) == buffer.maxlen:
+            self._elided[nodeid] += 1
+        buffer.append(record)
+
+    def begin_step(self, nodeid):
+        # 上一个步骤异常退出没有 end_step 时，丢弃它残留的缓冲区
+        if self._active is not None and self._active != nodeid:
+            self.end_step(self._active)
+        self._buffers[nodeid] = collections.deque(maxlen=max(self.capacity, 1))
+        self._elided[nodeid] = 0
+        self._active = nodeid
+
+    def end_step(self, nodeid):
+        """Stop capturing and return ``(entries, elided)`` for the step of ``nodeid``."""
+        if self._active == nodeid:
+            self._active = None
+        buffer = self._buffers.pop(nodeid, ())
+        elided = self._elided.pop(nodeid, 0)
+        # 只保留可序列化的最小信息 (xdist / SQLite)，时间和级别在渲染时再拼接
+        return [[record.created, record.levelname, record.getMessage()] for record in buffer], elided
 
 
 step_log_handler = StepLogHandler()
@@ -59,6 +109,133 @@ def _capture_screenshot_from_obj(obj):
     return None
 
 
+# 截图转码 / 缩略图在线程池中进行，不阻塞用例 teardown
+SCREENSHOT_FORMATS = {"png": ("PNG", "png"), "webp": ("WEBP", "webp"), "jpeg": ("JPEG", "jpg")}
+THUMBNAIL_SIZE = (320, 200)
+_screenshot_executor = None
+
+
+def _write_asset(path, data):
+    # 先写临时文件再 rename，多个 xdist worker 并发写入同一文件也安全
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _transcode_screenshot(img_bytes, path, thumb_path, pil_format, quality):
+    try:
+        with Image.open(io.BytesIO(img_bytes)) as img:
+            img = img.convert("RGB")
+            for target, size in ((path, None), (thumb_path, THUMBNAIL_SIZE)):
+                if size:
+                    img.thumbnail(size)
+                buffer = io.BytesIO()
+                img.save(buffer, format=pil_format, quality=quality)
+                _write_asset(target, buffer.getvalue())
+    except Exception as e:
+        # 原样保存 PNG (保留 .png 扩展名)，不生成缩略图；渲染时由 _screenshot_urls 改用它
+        print(f"Warning: Failed to transcode screenshot: {e}")
+        _write_asset(os.path.join(os.path.dirname(path), _png_name(path)), img_bytes)
+
+
+def _png_name(url):
+    # <digest>.webp / <digest>.thumb.jpg -> <digest>.png
+    return os.path.basename(url).split(".", 1)[0] + ".png"
+
+
+@functools.lru_cache(maxsize=None)
+def _can_encode(pil_format):
+    # Pillow 可能没有编译 WebP 等编码器
+    try:
+        Image.new("RGB", (1, 1)).save(io.BytesIO(), format=pil_format)
+        return True
+    except Exception:
+        return False
+
+
+def _store_screenshot(b64_data):
+    """
+    Write a screenshot into the asset store, named by the SHA-256 of the captured PNG.
+    Returns ``(url, thumbnail_url)`` relative to the report; the files are written in the background.
+    """
+    img_bytes = base64.b64decode(b64_data)
+    digest = hashlib.sha256(img_bytes).hexdigest()
+    asset_dir = os.path.join(os.path.dirname(os.path.abspath(report_options["report_path"])),
+                             report_options["assets_dir"])
+    url_prefix = f"{report_options['assets_dir']}/{digest}"
+
+    pil_format, ext = SCREENSHOT_FORMATS[report_options["screenshot_format"]]
+    if Image is None or not _can_encode(pil_format):
+        # 无法转码 (未安装 Pillow 或缺少编码器)：原样保存 PNG，不生成缩略图
+        path = os.path.join(asset_dir, f"{digest}.png")
+        if not os.path.exists(path):
+            os.makedirs(asset_dir, exist_ok=True)
+            _write_asset(path, img_bytes)
+        return f"{url_prefix}.png", None
+
+    path = os.path.join(asset_dir, f"{digest}.{ext}")
+    thumb_path = os.path.join(asset_dir, f"{digest}.thumb.{ext}")
+    # 相同截图只处理一次
+    if not os.path.exists(path):
+        global _screenshot_executor
+        os.makedirs(asset_dir, exist_ok=True)
+        if _screenshot_executor is None:
+            _screenshot_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report-screenshot")
+        _screenshot_executor.submit(_transcode_screenshot, img_bytes, path, thumb_path, pil_format,
+                                    report_options["screenshot_quality"])
+    return f"{url_prefix}.{ext}", f"{url_prefix}.thumb.{ext}"
+
+
+# 紧凑传输模式 (--report-spool)：Worker 把截图和较大的步骤日志写进共享 spool 目录，
+# 通过 execnet 只传文件名，Master 渲染报告时才读回
+def _spool_dir():
+    return os.path.join(os.path.dirname(os.path.abspath(report_options["report_path"])),
+                        report_options["spool_dir"])
+
+
+def _spool_write(data, ext):
+    """Write ``data`` into the spool directory, named by its SHA-256; returns the file name."""
+    name = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+    path = os.path.join(_spool_dir(), name)
+    if not os.path.exists(path):
+        os.makedirs(_spool_dir(), exist_ok=True)
+        _write_asset(path, data)
+    return name
+
+
+def _spool_payload(steps, b64_screenshot):
+    """
+    Move the screenshot and (above ``spool_threshold`` bytes) the step logs into the spool.
+    Returns ``(steps, logs_spool, b64_screenshot, screenshot_spool)`` with the moved parts emptied.
+    """
+    screenshot_spool = logs_spool = None
+    if b64_screenshot:
+        screenshot_spool = _spool_write(base64.b64decode(b64_screenshot), "png")
+        b64_screenshot = None
+    payload = json.dumps([step.get("logs", []) for step in steps], separators=(",", ":")).encode("utf-8")
+    if len(payload) > report_options["spool_threshold"]:
+        logs_spool = _spool_write(payload, "json")
+        steps = [dict(step, logs=[]) for step in steps]
+    return steps, logs_spool, b64_screenshot, screenshot_spool
+
+
+def _spool_read(name):
+    try:
+        with open(os.path.join(_spool_dir(), name), "rb") as f:
+            return f.read()
+    except OSError as e:
+        print(f"Warning: Failed to read spooled report data {name}: {e}")
+        return None
+
+
+def _drain_screenshot_jobs():
+    global _screenshot_executor
+    if _screenshot_executor is not None:
+        _screenshot_executor.shutdown(wait=True)
+        _screenshot_executor = None
+
+
 def _force_find_screenshot(request_or_item, func_args=None):
     if func_args:
         for name in ["page", "driver", "browser", "context", "web_driver"]:
@@ -99,31 +276,67 @@ def get_step_cache(nodeid):
     return step_execution_cache[nodeid]
 
 
+def _approx_size(obj):
+    # 粗略估算容器占用的字节数 (只递归 dict / list / tuple / deque)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(k) + _approx_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, collections.deque)):
+        size += sum(_approx_size(v) for v in obj)
+    return size
+
+
+def _plugin_cache_usage():
+    """Entries and approximate bytes held by this process's plugin caches."""
+    buffers = step_log_handler._buffers
+    return {
+        "entries": len(step_execution_cache) + len(buffers),
+        "bytes": _approx_size(step_execution_cache) + sum(sys.getsizeof(r) + _approx_size(r.__dict__)
+                                                          for b in buffers.values() for r in b),
+    }
+
+
+def _step_timing(node):
+    # 步骤相对场景开始的偏移量和耗时 (秒，monotonic 时钟)
+    end = time.monotonic()
+    step_start = getattr(node, "step_start_time", end)
+    scenario_start = getattr(node, "scenario_start_time", step_start)
+    return {"start": round(step_start - scenario_start, 4), "duration": round(end - step_start, 4)}
+
+
 def pytest_bdd_before_scenario(request, feature, scenario):
     step_execution_cache[request.node.nodeid] = []
+    request.node.scenario_start_time = time.monotonic()
     if hasattr(request.node, "b64_screenshot"):
         del request.node.b64_screenshot
 
 
 def pytest_bdd_before_step(request, feature, scenario, step, step_func):
-    step_log_handler.reset()
+    step_log_handler.capacity = report_options["step_log_limit"]
+    step_log_handler.begin_step(request.node.nodeid)
+    request.node.step_start_time = time.monotonic()
 
 
 def pytest_bdd_after_step(request, feature, scenario, step, step_func, step_func_args):
+    timing = _step_timing(request.node)
     cache = get_step_cache(request.node.nodeid)
-    captured_logs = list(step_log_handler.records)
+    captured_logs, elided = step_log_handler.end_step(request.node.nodeid)
     cache.append({
         "keyword": step.keyword,
         "name": step.name,
         "status": "passed",
-        "duration": 0,
-        "logs": captured_logs
+        "start": timing["start"],
+        "duration": timing["duration"],
+        "logs": captured_logs,
+        "logs_elided": elided
     })
 
 
 def pytest_bdd_step_error(request, feature, scenario, step, step_func, step_func_args, exception):
+    # 先记录耗时，截图时间不计入步骤
+    timing = _step_timing(request.node)
     cache = get_step_cache(request.node.nodeid)
-    captured_logs = list(step_log_handler.records)
+    captured_logs, elided = step_log_handler.end_step(request.node.nodeid)
 
     screenshot = _force_find_screenshot(request, func_args=step_func_args)
     if screenshot:
@@ -134,7 +347,10 @@ def pytest_bdd_step_error(request, feature, scenario, step, step_func, step_func
         "name": step.name,
         "status": "failed",
         "error": str(exception),
-        "logs": captured_logs
+        "start": timing["start"],
+        "duration": timing["duration"],
+        "logs": captured_logs,
+        "logs_elided": elided
     })
 
 
@@ -142,10 +358,303 @@ def pytest_bdd_step_error(request, feature, scenario, step, step_func, step_func
 # 3. Report Data Collection (Master Side)
 # ===========================
 
+def _trace_signature(text):
+    """Hash a traceback with addresses, parametrize ids, numbers and quoted values normalized away."""
+    normalized = re.sub(r"0x[0-9a-fA-F]+", "0x?", text)
+    # 参数化 id (test_x[chrome-1]) 不同的同一失败归为一类
+    normalized = re.sub(r"(?<=\w)\[[^\]\s]*\]", "[?]", normalized)
+    normalized = re.sub(r"(['\"]).*?\1", "?", normalized)
+    normalized = re.sub(r"\d+", "N", normalized)
+    normalized = re.sub(r"\s+", " ", normalized)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+# 同一个失败在不同运行中会带上不同的对象地址、临时目录和时间戳，去重前先抹掉；
+# 参数化 id 保留，每个场景显示的 trace 都是它自己的 (不同参数的同一失败由 _trace_signature 归类)
+_TMP_DIRS = sorted({tempfile.gettempdir(), "/tmp", "/var/folders"}, key=len, reverse=True)
+_TRACE_NOISE = (
+    (re.compile(r"0x[0-9a-fA-F]+"), "0x?"),
+    (re.compile("(?:%s)[/\\\\][^\\s'\":]*" % "|".join(map(re.escape, _TMP_DIRS))), "<tmp>"),
+    (re.compile(r"\b(?:\d{4}-\d\d-\d\d[ T])?\d\d:\d\d:\d\d(?:[.,]\d+)?\b"), "<time>"),
+)
+
+
+def _trace_key(text):
+    """Dedup key of a traceback: its digest once addresses, temp paths and timestamps are removed."""
+    for pattern, replacement in _TRACE_NOISE:
+        text = pattern.sub(replacement, text)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _trace_summary(text):
+    # 取第一行 "E   ..." 作为摘要，没有则取最后一个非空行
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in lines:
+        if line.startswith("E "):
+            return line[1:].strip()[:200]
+    return lines[-1][:200] if lines else ""
+
+
+def get_sort_key(text):
+    match = re.match(r"(\d+(\.\d+)*)", text.strip())
+    if match:
+        return [int(x) for x in match.group(0).split('.') if x]
+    return [0]
+
+
+class SqliteResultStore:
+    """
+    SQLite (WAL) 结果存储。
+    结果到达即写入数据库，统计由 SQL 聚合，渲染时按 Feature 逐行读取，
+    Master 内存不随场景数增长；会话结束后数据库仍可直接查询。
+    """
+
+    # 单独成列、可查询的字段；其余字段以 JSON 存在 data 列
+    COLUMNS = ("nodeid", "name", "status", "duration")
+    COMMIT_EVERY = 500
+
+    def __init__(self, path):
+        self.path = path
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE scenarios (
+                id INTEGER PRIMARY KEY,
+                feature TEXT NOT NULL,
+                sort_key TEXT NOT NULL,
+                nodeid TEXT NOT NULL,
+                name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                duration REAL NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX idx_scenarios_feature ON scenarios (feature, sort_key, id);
+            CREATE TABLE traces (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                signature TEXT NOT NULL,
+                text TEXT NOT NULL
+            );
+        """)
+        self._uncommitted = 0
+
+    @staticmethod
+    def _sort_key_text(name):
+        # 与 get_sort_key 的列表比较顺序一致的定长文本
+        return ".".join(f"{n:010d}" for n in get_sort_key(name))
+
+    @classmethod
+    def open_reader(cls, path):
+        """Open an existing result database read-only (e.g. from a render process)."""
+        store = cls.__new__(cls)
+        store.path = path
+        store.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        store._uncommitted = 0
+        return store
+
+    def add(self, feature_name, scenario_result):
+        data = {k: v for k, v in scenario_result.items() if k not in self.COLUMNS}
+        self.conn.execute(
+            "INSERT INTO scenarios (feature, sort_key, nodeid, name, status, duration, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (feature_name, self._sort_key_text(scenario_result["name"]), scenario_result["nodeid"],
+             scenario_result["name"], scenario_result["status"], scenario_result["duration"],
+             json.dumps(data, ensure_ascii=False)))
+        self._uncommitted += 1
+        if self._uncommitted >= self.COMMIT_EVERY:
+            self.commit()
+
+    def add_trace(self, trace_id, key, signature, text):
+        # 场景 data 里的 "trace" 是这张表的 id
+        self.conn.execute("INSERT INTO traces (id, key, signature, text) VALUES (?, ?, ?, ?)",
+                          (trace_id, key, signature, text))
+
+    def find_trace(self, key):
+        row = self.conn.execute("SELECT id FROM traces WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def trace_text(self, trace_id):
+        row = self.conn.execute("SELECT text FROM traces WHERE id = ?", (trace_id,)).fetchone()
+        if row is None:
+            raise IndexError(trace_id)
+        return row[0]
+
+    def trace_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM traces").fetchone()[0]
+
+    def iter_traces(self):
+        return (text for text, in self.conn.execute("SELECT text FROM traces ORDER BY id"))
+
+    def commit(self):
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def feature_stats(self):
+        """Return ``{feature: {"total": n, <status>: n, ...}}`` aggregated in SQL."""
+        self.commit()
+        stats = {}
+        rows = self.conn.execute("SELECT feature, status, COUNT(*) FROM scenarios GROUP BY feature, status")
+        for feature_name, status, count in rows:
+            f_stats = stats.setdefault(feature_name, {"total": 0, "passed": 0, "failed": 0, "error": 0, "skipped": 0})
+            f_stats[status] = count
+            f_stats["total"] += count
+        return stats
+
+    def iter_scenarios(self, feature_name):
+        rows = self.conn.execute(
+            "SELECT nodeid, name, status, duration, data FROM scenarios WHERE feature = ? ORDER BY sort_key, id",
+            (feature_name,))
+        for nodeid, name, status, duration, data in rows:
+            scenario_result = json.loads(data)
+            scenario_result.update(nodeid=nodeid, name=name, status=status, duration=duration)
+            yield scenario_result
+
+    def feature_durations(self, feature_name):
+        rows = self.conn.execute("SELECT duration FROM scenarios WHERE feature = ? ORDER BY sort_key, id",
+                                 (feature_name,))
+        return [r[0] for r in rows]
+
+    def iter_durations(self):
+        self.commit()
+        return self.conn.execute("SELECT nodeid, name, status, duration FROM scenarios")
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class _StoredTraces:
+    # traces 表的只读序列视图：按下标从数据库读取，trace 文本不常驻内存
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return self.store.trace_count()
+
+    def __getitem__(self, trace_id):
+        return self.store.trace_text(trace_id)
+
+    def __iter__(self):
+        return self.store.iter_traces()
+
+
+class _StoredScenarios:
+    # 可重复迭代的场景序列，每次迭代重新查询数据库
+    def __init__(self, store, feature_name):
+        self.store = store
+        self.feature_name = feature_name
+
+    def __iter__(self):
+        return self.store.iter_scenarios(self.feature_name)
+
+
+class _TDigest:
+    """
+    Merging t-digest (Dunning & Ertl): approximate quantiles of a stream in memory bounded by
+    ``compression``. Centroids near the tails stay small, so p90/p99 keep their precision.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []  # [[mean, weight]]，按 mean 排序
+        self._buffer = []
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self._buffer.append(value)
+        self.count += 1
+        self.total += value
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self.centroids + [[value, 1] for value in self._buffer])
+        self._buffer = []
+        self.min = min(self.min, points[0][0])
+        self.max = max(self.max, points[-1][0])
+        last = points[0]
+        merged = [last]
+        cumulative = 0
+        count = self.count
+        scale = 4 / (count * self.compression)
+        for point in points:
+            if point is last:
+                continue
+            weight = last[1] + point[1]
+            # 质心中心的排位 x = q * count；q 越靠近两端，允许的权重 4*count*q*(1-q)/compression 越小
+            x = cumulative + weight / 2
+            if weight <= 1 or weight <= scale * x * (count - x):
+                last[0] += (point[0] - last[0]) * point[1] / weight
+                last[1] = weight
+            else:
+                cumulative += last[1]
+                last = point
+                merged.append(last)
+        self.centroids = merged
+
+    def quantile(self, q):
+        """Return the approximate ``q`` quantile (0..1), interpolating between centroid centres."""
+        self._compress()
+        if not self.centroids:
+            return 0.0
+        target = q * self.count
+        prev_pos, prev_mean = 0.0, self.min
+        cumulative = 0
+        for mean, weight in self.centroids:
+            pos = cumulative + weight / 2
+            if target <= pos:
+                if pos == prev_pos:
+                    return mean
+                return prev_mean + (mean - prev_mean) * (target - prev_pos) / (pos - prev_pos)
+            prev_pos, prev_mean = pos, mean
+            cumulative += weight
+        if self.count == prev_pos:
+            return self.max
+        return prev_mean + (self.max - prev_mean) * (target - prev_pos) / (self.count - prev_pos)
+
+
+TIMELINE_PHASES = ("setup", "call", "teardown")
+DURATION_QUANTILES = (0.5, 0.9, 0.99)
+
+# report dump (JSON Lines) 格式版本，格式变化时递增
+DUMP_VERSION = 1
+
+
 class TestSessionReport:
-    def __init__(self):
+    def __init__(self, db_path=None):
+        self.store = SqliteResultStore(db_path) if db_path else None
         self.features = {}
         self.all_markers = set()
+        self.regressions = []
+        # 按步骤文本汇总耗时: name -> [次数, 总耗时, 最大耗时]
+        # call 失败后 teardown 再出错时同一场景会上报两次，步骤只按 nodeid 统计一次
+        self.step_stats = {}
+        self._step_nodeids = set()
+        # 各进程 (xdist worker 或本进程) 插件缓存的最新占用与峰值
+        self.plugin_cache = {}
+        self.plugin_cache_peak = 0
+        # 去重后的 traceback 文本 (场景只存下标，SQLite 模式下只存在库里) 与按归一化签名聚合的失败簇
+        self.traces = _StoredTraces(self.store) if self.store is not None else []
+        self._trace_ids = {}
+        self.failure_clusters = {}
+        # nodeid -> [worker, setup 起止, call 起止, teardown 起止, status]，用于 Worker 时间轴
+        self.timeline = {}
+        # fixture 名 -> [scope, 次数, 总耗时, 最大耗时]
+        self.fixture_stats = {}
+        # 场景耗时的流式统计：按 Feature / Marker 的 t-digest，以及最慢 N 个场景的小顶堆
+        self.duration_digests = {"feature": {}, "marker": {}}
+        self.overall_digest = _TDigest()
+        self.slowest_limit = 20
+        self._slowest = []
         self.start_time = time.time()
         self.duration = 0
         self.total = 0
@@ -166,14 +675,6 @@ class TestSessionReport:
         feature_name = getattr(report, "feature_name", "Unknown Feature")
         scenario_name = getattr(report, "scenario_name", report.nodeid)
 
-        if feature_name not in self.features:
-            self.features[feature_name] = {
-                "name": feature_name,
-                "scenarios": [],
-                "stats": {"total": 0, "passed": 0, "failed": 0, "error": 0, "skipped": 0},
-                "status": "passed"
-            }
-
         # Clean Logs
         def clean_traceback(text):
             if not text: return ""
@@ -181,9 +682,12 @@ class TestSessionReport:
             return re.sub(r'(?m)^[-_ ]{4,}$.*\n?', '', text)
 
         log_content = []
+        trace_id = signature = None
         if report.longrepr:
+            # Error Trace 单独去重存放，页面上再拼回日志开头
             cleaned_trace = clean_traceback(report.longrepr)
-            log_content.append(f"=== Error Trace ===\n{cleaned_trace}")
+            signature = _trace_signature(cleaned_trace)
+            trace_id = self._trace_id(cleaned_trace, signature)
         else:
             if report.outcome == 'passed':
                 log_content.append("=== Execution Result ===\nTest Passed successfully.")
@@ -202,23 +706,87 @@ class TestSessionReport:
 
         # 从 report 对象获取数据 (这些数据在 makereport 中被挂载)
         screenshot = getattr(report, "extra_screenshot", None)
+        screenshot_url = getattr(report, "extra_screenshot_url", None)
+        screenshot_thumb = getattr(report, "extra_screenshot_thumb", None)
+        screenshot_spool = getattr(report, "extra_screenshot_spool", None)
         steps = getattr(report, "extra_steps", [])
+        logs_spool = getattr(report, "extra_logs_spool", None)
         markers = getattr(report, "extra_markers", [])
 
-        # 收集 Markers 到全局集合
-        for m in markers:
-            self.all_markers.add(m)
-
         scenario_result = {
             "name": scenario_name,
             "status": status,
             "duration": round(report.duration, 4),
             "log": full_log,
+            "trace": trace_id,
+            "signature": signature,
             "nodeid": report.nodeid,
             "screenshot": screenshot,
+            "screenshot_url": screenshot_url,
+            "screenshot_thumb": screenshot_thumb,
+            "screenshot_spool": screenshot_spool,
             "steps": steps,
+            "logs_spool": logs_spool,
             "markers": markers
         }
+        timing = self.timeline.get(report.nodeid)
+        if timing is not None:
+            # 各阶段耗时随场景一起保存 (SQLite、dump、分页报告都能拿到)，不依赖全局时间轴
+            scenario_result["phases"] = {
+                phase: round(timing[2 + 2 * k] - timing[1 + 2 * k], 4) if timing[1 + 2 * k] is not None else None
+                for k, phase in enumerate(TIMELINE_PHASES)}
+            scenario_result["worker"] = timing[0]
+        self.add_scenario(feature_name, scenario_result)
+        return scenario_result
+
+    def add_scenario(self, feature_name, scenario_result):
+        status = scenario_result["status"]
+
+        # 收集 Markers 到全局集合
+        for m in scenario_result["markers"]:
+            self.all_markers.add(m)
+
+        signature = scenario_result.get("signature")
+        if signature and status in ("failed", "error"):
+            cluster = self.failure_clusters.get(signature)
+            if cluster is None:
+                text = self.traces[scenario_result["trace"]]
+                cluster = self.failure_clusters[signature] = {
+                    "signature": signature, "summary": _trace_summary(text), "trace": text,
+                    "count": 0, "examples": []}
+            cluster["count"] += 1
+            if len(cluster["examples"]) < 5:
+                cluster["examples"].append({"name": scenario_result["name"], "nodeid": scenario_result["nodeid"]})
+
+        self._add_duration(feature_name, scenario_result)
+
+        steps = scenario_result["steps"]
+        if scenario_result["nodeid"] in self._step_nodeids:
+            steps = ()
+        elif steps:
+            self._step_nodeids.add(scenario_result["nodeid"])
+        for step in steps:
+            duration = step.get("duration") or 0
+            entry = self.step_stats.get(step["name"])
+            if entry is None:
+                self.step_stats[step["name"]] = [1, duration, duration]
+            else:
+                entry[0] += 1
+                entry[1] += duration
+                entry[2] = max(entry[2], duration)
+
+        if self.store is not None:
+            # 统计在 finalize 中由 SQL 聚合
+            self.store.add(feature_name, scenario_result)
+            return
+
+        if feature_name not in self.features:
+            self.features[feature_name] = {
+                "name": feature_name,
+                "scenarios": [],
+                "stats": {"total": 0, "passed": 0, "failed": 0, "error": 0, "skipped": 0},
+                "status": "passed"
+            }
 
         self.features[feature_name]["scenarios"].append(scenario_result)
         self.features[feature_name]["stats"]["total"] += 1
@@ -234,15 +802,452 @@ class TestSessionReport:
         elif status == "skipped":
             self.skipped += 1
 
+    def _add_duration(self, feature_name, scenario_result):
+        # 跳过的场景不计入耗时统计
+        if scenario_result["status"] == "skipped":
+            return
+        duration = scenario_result["duration"] or 0
+        self.overall_digest.add(duration)
+        digests = self.duration_digests
+        for group, keys in (("feature", (feature_name,)), ("marker", scenario_result["markers"])):
+            for key in keys:
+                digest = digests[group].get(key)
+                if digest is None:
+                    digest = digests[group][key] = _TDigest()
+                digest.add(duration)
+
+        if len(self._slowest) < self.slowest_limit or duration > self._slowest[0][0]:
+            entry = (duration, self.overall_digest.count, {
+                "name": scenario_result["name"], "nodeid": scenario_result["nodeid"], "feature": feature_name,
+                "status": scenario_result["status"], "duration": round(duration, 3)})
+            if len(self._slowest) < self.slowest_limit:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heapreplace(self._slowest, entry)
+
+    def finalize(self):
+        """Compute the session duration plus scenario and feature statistics."""
+        self.duration = round(time.time() - self.start_time, 2)
+
+        if self.store is not None:
+            self.features = {}
+            for feature_name, stats in self.store.feature_stats().items():
+                self.features[feature_name] = {"name": feature_name, "stats": stats, "status": "passed"}
+            for key in ("total", "passed", "failed", "error", "skipped"):
+                setattr(self, key, sum(f["stats"][key] for f in self.features.values()))
+
+        # 统计 Feature 维度的数据 (Pass/Fail/Error/Skip)
+        self.feature_total = len(self.features)
+        self.feature_passed = self.feature_failed = self.feature_error = self.feature_skipped = 0
+        for f_name, f_data in self.features.items():
+            stats = f_data["stats"]
+            if stats["failed"] > 0:
+                f_data["status"] = "failed"
+                self.feature_failed += 1
+            elif stats["error"] > 0:
+                f_data["status"] = "error"
+                self.feature_error += 1
+            elif stats["skipped"] == stats["total"] and stats["total"] > 0:
+                f_data["status"] = "skipped"
+                self.feature_skipped += 1
+            else:
+                f_data["status"] = "passed"
+                self.feature_passed += 1
+
+    def _trace_id(self, text, signature):
+        # 只差地址 / 临时目录 / 时间戳的 traceback 共用第一次出现的文本
+        key = _trace_key(text)
+        if self.store is not None:
+            trace_id = self.store.find_trace(key)
+            if trace_id is None:
+                trace_id = len(self.traces)
+                self.store.add_trace(trace_id, key, signature, text)
+            return trace_id
+        trace_id = self._trace_ids.get(key)
+        if trace_id is None:
+            trace_id = self._trace_ids[key] = len(self.traces)
+            self.traces.append(text)
+        return trace_id
+
+    def feature_durations(self, feature_name):
+        """Scenario durations of one feature, in report order."""
+        if self.store is not None:
+            return self.store.feature_durations(feature_name)
+        return [s["duration"] for s in self.features[feature_name]["scenarios"]]
+
+    def sorted_clusters(self):
+        """Failure clusters, largest first."""
+        return sorted(self.failure_clusters.values(), key=lambda c: c["count"], reverse=True)
+
+    def record_phase(self, report):
+        for name, scope, seconds in getattr(report, "extra_fixtures", None) or ():
+            entry = self.fixture_stats.get(name)
+            if entry is None:
+                self.fixture_stats[name] = [scope, 1, seconds, seconds]
+            else:
+                entry[1] += 1
+                entry[2] += seconds
+                entry[3] = max(entry[3], seconds)
+
+        phase = getattr(report, "extra_phase", None)
+        if phase is None:
+            return
+        entry = self.timeline.get(report.nodeid)
+        if entry is None:
+            entry = self.timeline[report.nodeid] = [report.extra_worker, None, None, None, None, None, None, "passed"]
+        slot = 1 + 2 * TIMELINE_PHASES.index(report.when)
+        entry[slot:slot + 2] = phase
+        if report.outcome == "failed":
+            entry[7] = "failed" if report.when == "call" else "error"
+        elif report.outcome == "skipped" and entry[7] == "passed":
+            entry[7] = "skipped"
+
+    def timeline_data(self):
+        """
+        Return ``(island, workers)``: the Gantt entries for the page and a per-worker summary.
+        Entries are ``[worker_index, start, setup, call, teardown, status, nodeid]`` in seconds from the first test.
+        """
+        if not self.timeline:
+            return None, []
+        spans = []
+        for nodeid, entry in self.timeline.items():
+            starts = [entry[i] for i in (1, 3, 5) if entry[i] is not None]
+            stops = [entry[i] for i in (2, 4, 6) if entry[i] is not None]
+            durations = [round(entry[i + 1] - entry[i], 4) if entry[i] is not None else 0 for i in (1, 3, 5)]
+            spans.append((entry[0], min(starts), max(stops), durations, entry[7], nodeid))
+        t0 = min(span[1] for span in spans)
+        # gw2 排在 gw10 之前
+        worker_names = sorted({span[0] for span in spans},
+                              key=lambda name: [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", name)])
+        worker_index = {name: i for i, name in enumerate(worker_names)}
+        spans.sort(key=lambda span: (worker_index[span[0]], span[1]))
+
+        entries = []
+        summary = {name: {"name": name, "tests": 0, "busy": 0.0, "first": None, "last": 0.0} for name in worker_names}
+        for worker, start, stop, durations, status, nodeid in spans:
+            entries.append([worker_index[worker], round(start - t0, 3)] + durations + [status, nodeid])
+            w = summary[worker]
+            w["tests"] += 1
+            w["busy"] += stop - start
+            w["first"] = start - t0 if w["first"] is None else w["first"]
+            w["last"] = max(w["last"], stop - t0)
+        span_total = max(w["last"] for w in summary.values())
+        workers = []
+        for w in summary.values():
+            workers.append({"name": w["name"], "tests": w["tests"], "busy": round(w["busy"], 2),
+                            "idle": round(w["last"] - w["first"] - w["busy"], 2), "finished": round(w["last"], 2),
+                            "lag": round(span_total - w["last"], 2)})
+        island = {"span": round(span_total, 3), "workers": worker_names, "entries": entries}
+        return island, workers
+
+    def phase_costs(self):
+        """
+        Return ``(phases, fixtures)``: total setup/call/teardown time across the session and the fixture
+        setup cost by fixture name (largest first), each with its share of the total test time.
+        """
+        totals = dict.fromkeys(TIMELINE_PHASES, 0.0)
+        for entry in self.timeline.values():
+            for k, phase in enumerate(TIMELINE_PHASES):
+                if entry[1 + 2 * k] is not None:
+                    totals[phase] += entry[2 + 2 * k] - entry[1 + 2 * k]
+        wall = sum(totals.values()) or 1
+        phases = [{"name": phase, "total": round(total, 2), "share": round(100 * total / wall, 1)}
+                  for phase, total in totals.items()]
+        fixtures = [{"name": name, "scope": scope, "count": count, "total": round(total, 3),
+                     "avg": round(total / count, 3), "max": round(longest, 3),
+                     "share": round(100 * total / wall, 1)}
+                    for name, (scope, count, total, longest) in self.fixture_stats.items()]
+        fixtures.sort(key=lambda f: f["total"], reverse=True)
+        return phases, fixtures
+
+    def record_plugin_cache(self, report):
+        usage = getattr(report, "extra_plugin_cache", None)
+        if usage:
+            self.plugin_cache[getattr(report, "worker_id", "main")] = usage
+            self.plugin_cache_peak = max(self.plugin_cache_peak, usage["bytes"])
+
+    def plugin_cache_summary(self):
+        entries = sum(u["entries"] for u in self.plugin_cache.values())
+        size = sum(u["bytes"] for u in self.plugin_cache.values())
+        return (f"{entries} entries / {size / 1024:.1f} KB across {len(self.plugin_cache)} process(es), "
+                f"peak {self.plugin_cache_peak / 1024:.1f} KB")
+
+    def slowest_steps(self, limit=20):
+        """Return the steps with the largest total time across the session."""
+        rows = [{"name": name, "count": count, "total": round(total, 3), "avg": round(total / count, 3),
+                 "max": round(longest, 3)}
+                for name, (count, total, longest) in self.step_stats.items()]
+        return heapq.nlargest(limit, rows, key=lambda r: r["total"])
+
+    def slowest_scenarios(self):
+        """The slowest ``slowest_limit`` scenarios, slowest first."""
+        return [entry[2] for entry in sorted(self._slowest, reverse=True)]
+
+    def duration_percentiles(self):
+        """
+        Return ``(overall, features, markers)`` rows with count, total time, share of the run and
+        approximate p50/p90/p99; features are ordered by total time, markers by name.
+        """
+        run_total = self.overall_digest.total or 1
+
+        def row(name, digest):
+            return {"name": name, "count": digest.count, "total": round(digest.total, 2),
+                    "share": round(100 * digest.total / run_total, 1),
+                    "quantiles": [round(digest.quantile(q), 3) for q in DURATION_QUANTILES]}
+
+        overall = row("All scenarios", self.overall_digest) if self.overall_digest.count else None
+        features = [row(name, d) for name, d in self.duration_digests["feature"].items()]
+        features.sort(key=lambda r: r["total"], reverse=True)
+        markers = [row(name, self.duration_digests["marker"][name]) for name in sorted(self.duration_digests["marker"])]
+        return overall, features, markers
+
+    def iter_durations(self):
+        """Yield ``(nodeid, name, status, duration)`` for every scenario."""
+        if self.store is not None:
+            yield from self.store.iter_durations()
+            return
+        for feature_data in self.features.values():
+            for s in feature_data["scenarios"]:
+                yield s["nodeid"], s["name"], s["status"], s["duration"]
+
+    def sorted_features(self):
+        """Return ``[(feature_name, feature_data)]`` in report order, scenarios sorted by name."""
+        features_list = sorted(self.features.items(), key=lambda item: get_sort_key(item[0]))
+        for feature_name, feature_data in features_list:
+            if self.store is not None:
+                feature_data["scenarios"] = _StoredScenarios(self.store, feature_name)
+            else:
+                feature_data["scenarios"].sort(key=lambda s: get_sort_key(s["name"]))
+        return features_list
+
+    def dump(self, path):
+        """
+        Write the session as JSON Lines for ``report_tool.py merge``: a session header, the distinct traces,
+        the worker timeline and fixture costs, then one line per scenario.
+        """
+        # 截图和 spool 文件相对 report.html 所在目录；记录它相对 dump 文件的位置，分片目录整体搬走也能找到
+        report_dir = os.path.dirname(os.path.abspath(report_options["report_path"]))
+        with open(path, "w", encoding="utf-8") as f:
+            header = {"type": "session", "version": DUMP_VERSION, "start_time": self.start_time,
+                      "duration": self.duration, "assets_dir": report_options["assets_dir"],
+                      "spool_dir": report_options["spool_dir"],
+                      "report_dir": os.path.relpath(report_dir, os.path.dirname(os.path.abspath(path)))}
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for trace_id, text in enumerate(self.traces):
+                f.write(json.dumps({"type": "trace", "id": trace_id, "text": text}, ensure_ascii=False) + "\n")
+            for nodeid, entry in self.timeline.items():
+                f.write(json.dumps({"type": "phase", "nodeid": nodeid, "entry": entry}, ensure_ascii=False) + "\n")
+            for name, stats in self.fixture_stats.items():
+                f.write(json.dumps({"type": "fixture", "name": name, "stats": stats}, ensure_ascii=False) + "\n")
+            for feature_name, feature_data in self.sorted_features():
+                for scenario_result in feature_data["scenarios"]:
+                    record = {"type": "scenario", "feature": feature_name, "scenario": scenario_result}
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class DurationHistory:
+    """
+    跨运行的耗时历史库 (SQLite)，按 nodeid 记录每次运行的耗时。
+    本次耗时与最近 WINDOW 次通过运行的中位数 / MAD 比较，稳健 z 分数超过阈值即视为变慢。
+    查询走 (nodeid, run_id) 主键，只读取每个 nodeid 最近的 WINDOW 条，与历史长度无关。
+    """
+
+    WINDOW = 20
+    MIN_SAMPLES = 5
+    Z_THRESHOLD = 3.5
+    MIN_SLOWDOWN = 0.2      # 至少慢 20%
+    MIN_DELTA = 0.1         # 且至少慢 0.1s, 过滤毫秒级抖动
+    KEEP_RUNS = 500
+    STATUS_SEVERITY = {"passed": 0, "skipped": 1, "failed": 2, "error": 3}
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                started REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS durations (
+                nodeid TEXT NOT NULL,
+                run_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                duration REAL NOT NULL,
+                PRIMARY KEY (nodeid, run_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_durations_run ON durations (run_id);
+        """)
+
+    def _baseline(self, nodeid):
+        rows = self.conn.execute(
+            "SELECT duration FROM durations WHERE nodeid = ? AND status = 'passed' "
+            "ORDER BY run_id DESC LIMIT ?", (nodeid, self.WINDOW))
+        return [r[0] for r in rows]
+
+    def record_run(self, report_data_obj):
+        """Compare this run against history, store it, and return the flagged regressions (worst first)."""
+        # call 失败后 teardown 又出错时同一 nodeid 会有两条结果，只保留最严重的一条
+        current = {}
+        for nodeid, name, status, duration in report_data_obj.iter_durations():
+            previous = current.get(nodeid)
+            if previous is None or self.STATUS_SEVERITY.get(status, 0) > self.STATUS_SEVERITY.get(previous[1], 0):
+                current[nodeid] = (name, status, duration)
+
+        regressions = []
+        for nodeid, (name, status, duration) in current.items():
+            if status != "passed":
+                continue
+            samples = self._baseline(nodeid)
+            if len(samples) < self.MIN_SAMPLES:
+                continue
+            median = statistics.median(samples)
+            mad = statistics.median(abs(x - median) for x in samples)
+            # MAD 为 0 (耗时完全稳定) 时给一个下限，避免除零和过度敏感
+            scale = max(mad, 0.01 * median, 0.001)
+            score = 0.6745 * (duration - median) / scale
+            delta = duration - median
+            if score > self.Z_THRESHOLD and delta > max(self.MIN_DELTA, self.MIN_SLOWDOWN * median):
+                regressions.append({
+                    "nodeid": nodeid,
+                    "name": name,
+                    "duration": duration,
+                    "median": round(median, 4),
+                    "mad": round(mad, 4),
+                    "change": round(100 * delta / median, 1) if median else None,
+                    "score": round(score, 1),
+                    "samples": len(samples),
+                })
+
+        with self.conn:
+            run_id = self.conn.execute("INSERT INTO runs (started) VALUES (?)",
+                                       (report_data_obj.start_time,)).lastrowid
+            self.conn.executemany("INSERT INTO durations (nodeid, run_id, status, duration) VALUES (?, ?, ?, ?)",
+                                  ((nodeid, run_id, status, duration)
+                                   for nodeid, (_, status, duration) in current.items()))
+            self.conn.execute("DELETE FROM durations WHERE run_id <= ?", (run_id - self.KEEP_RUNS,))
+            self.conn.execute("DELETE FROM runs WHERE id <= ?", (run_id - self.KEEP_RUNS,))
+
+        regressions.sort(key=lambda r: r["score"], reverse=True)
+        return regressions
+
+    def close(self):
+        self.conn.close()
+
+
+# === Report Options ===
+# 默认值也供不经过 pytest 的调用方使用 (例如 bench_report.py)
+report_options = {
+    "report_path": "report.html",
+    "stream": False,
+    "assets": False,
+    "assets_dir": "report-assets",
+    "template_cache_dir": None,
+    "live": False,
+    "live_interval": 10.0,
+    "live_batch": 200,
+    "db_path": None,
+    "history_path": None,
+    "offline": False,
+    "compress": False,
+    "screenshot_format": "png",
+    "screenshot_quality": 80,
+    "step_log_limit": 200,
+    "spool": False,
+    "spool_dir": "report-spool",
+    "spool_threshold": 4096,
+    "render_jobs": 1,
+    "split_threshold": 20000,
+    "dump_path": None,
+}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("demoreport", "HTML test report")
+    group.addoption("--report-stream", action="store_true", default=False,
+                    help="Write report.html in chunks as the template renders instead of "
+                         "building the whole page in memory first.")
+    group.addoption("--report-assets", action="store_true", default=False,
+                    help="Store failure screenshots in report-assets/ (deduplicated by SHA-256) and "
+                         "link them from the report instead of inlining base64.")
+    group.addoption("--report-live", action="store_true", default=False,
+                    help="Write report.html at session start and keep it updated while tests run.")
+    group.addoption("--report-live-interval", type=float, default=report_options["live_interval"],
+                    help="Seconds between live report updates (default: %(default)s).")
+    group.addoption("--report-db", metavar="PATH", default=None,
+                    help="Keep results in a SQLite database at PATH instead of in memory. "
+                         "The database stays queryable after the run.")
+    group.addoption("--report-history", metavar="PATH", default=None,
+                    help="Record per-scenario durations in a cross-run SQLite history at PATH and flag "
+                         "scenarios that got significantly slower than their rolling median.")
+    group.addoption("--report-offline", action="store_true", default=False,
+                    help="Produce a self-contained report: inline the vendored CSS and minify inline "
+                         "CSS/JS instead of loading Bootstrap from a CDN.")
+    group.addoption("--report-compress", action="store_true", default=False,
+                    help="Embed the report data gzip-compressed (inflated by the browser) and also "
+                         "write report.html.gz.")
+    group.addoption("--report-screenshot-format", choices=sorted(SCREENSHOT_FORMATS),
+                    default=report_options["screenshot_format"],
+                    help="Transcode stored screenshots (with --report-assets, requires Pillow) and "
+                         "generate thumbnails (default: %(default)s).")
+    group.addoption("--report-screenshot-quality", type=int, default=report_options["screenshot_quality"],
+                    help="Quality for webp/jpeg screenshots (default: %(default)s).")
+    group.addoption("--report-spool", action="store_true", default=False,
+                    help="Send only references for screenshots and large step logs from xdist workers; "
+                         "the data goes through report-spool/ and is read back when the report is rendered.")
+    group.addoption("--report-jobs", type=int, default=report_options["render_jobs"], metavar="N",
+                    help="Encode the report data of each feature in N worker processes "
+                         "(0 = one per CPU, default: %(default)s).")
+    group.addoption("--report-split-threshold", type=int, default=report_options["split_threshold"], metavar="N",
+                    help="Above N scenarios write report.html as an index page plus one page per feature "
+                         "in report-pages/ (0 = always a single page, default: %(default)s).")
+    group.addoption("--report-dump", metavar="PATH", default=None,
+                    help="Also write the results as JSON Lines to PATH; dumps from several CI shards "
+                         "can be combined with 'python report_tool.py merge'.")
+    group.addoption("--report-step-log-limit", type=int, default=report_options["step_log_limit"],
+                    help="Keep at most this many log lines per step; older lines are elided "
+                         "(default: %(default)s).")
+
 
 # === Hook: Initialize Report Data on Master ===
 def pytest_configure(config):
+    report_options["stream"] = config.getoption("report_stream")
+    report_options["assets"] = config.getoption("report_assets")
+    report_options["live"] = config.getoption("report_live")
+    report_options["live_interval"] = config.getoption("report_live_interval")
+    report_options["db_path"] = config.getoption("report_db")
+    report_options["history_path"] = config.getoption("report_history")
+    report_options["offline"] = config.getoption("report_offline")
+    report_options["compress"] = config.getoption("report_compress")
+    report_options["screenshot_format"] = config.getoption("report_screenshot_format")
+    report_options["screenshot_quality"] = config.getoption("report_screenshot_quality")
+    report_options["step_log_limit"] = config.getoption("report_step_log_limit")
+    report_options["spool"] = config.getoption("report_spool")
+    report_options["render_jobs"] = config.getoption("report_jobs")
+    report_options["split_threshold"] = config.getoption("report_split_threshold")
+    report_options["dump_path"] = config.getoption("report_dump")
+    # Jinja 字节码缓存放在 .pytest_cache 下，跨会话复用
+    if getattr(config, "cache", None) is not None:
+        report_options["template_cache_dir"] = str(config.cache.mkdir("demoreport-jinja"))
+
     # 如果是 Master 节点或者非分布式执行，初始化 ReportData
     # workerinput 属性存在说明是 Worker 节点
     if not hasattr(config, "workerinput"):
         config.test_session_report = TestSessionReport()
 
 
+# === Hook: Fixture setup cost ===
+# 每个 fixture 自身的 setup 耗时 (依赖的 fixture 在 hook 之前已经建好，不重复计入)，
+# 在下一个 makereport 时挂到 report 上
+_fixture_timings = []
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    start = time.perf_counter()
+    yield
+    _fixture_timings.append([fixturedef.argname, fixturedef.scope, round(time.perf_counter() - start, 4)])
+
+
 # === Hook: Worker Side - Collect Data & Attach to Report ===
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
@@ -282,22 +1287,119 @@ def pytest_runtest_makereport(item, call):
         else:
             feature_name = item.nodeid.split("::")[0]
 
+        # 外部截图模式：在 Worker 上落盘，只把相对路径传给 Master
+        screenshot_url = screenshot_thumb = None
+        if final_screenshot and report_options["assets"]:
+            screenshot_url, screenshot_thumb = _store_screenshot(final_screenshot)
+            final_screenshot = None
+
+        screenshot_spool = logs_spool = None
+        if report_options["spool"]:
+            steps, logs_spool, final_screenshot, screenshot_spool = _spool_payload(steps, final_screenshot)
+
         # === 关键：将所有数据挂载到 report 对象上 ===
         # xdist 会序列化这个 report 对象传给 Master
         report.extra_screenshot = final_screenshot
+        report.extra_screenshot_url = screenshot_url
+        report.extra_screenshot_thumb = screenshot_thumb
+        report.extra_screenshot_spool = screenshot_spool
         report.extra_steps = steps
+        report.extra_logs_spool = logs_spool
         report.extra_markers = item_markers
         report.feature_name = feature_name
         report.scenario_name = scenario_name
 
+    # 各阶段的 wall-clock 起止时间和所在 Worker，供 Worker 时间轴使用
+    report.extra_phase = [call.start, call.stop]
+    report.extra_worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    report.extra_fixtures = _fixture_timings[:]
+    del _fixture_timings[:]
+
+    # teardown 是最后一个阶段：步骤和截图都已挂到 report 上，释放缓存
+    if report.when == "teardown":
+        step_execution_cache.pop(item.nodeid, None)
+        if hasattr(item, "b64_screenshot"):
+            del item.b64_screenshot
+        report.extra_plugin_cache = _plugin_cache_usage()
+
 
 _master_report_data = None
+_live_report = None
+
+
+class LiveReportWriter:
+    """
+    会话进行中的实时报告。
+    每次刷新把新结果写成一个编号递增的 JS 分片 (report-live/000001.js, 000002.js ...)，
+    report.html 只加载下一个尚未读过的分片，每次轮询的开销只与新结果数有关。
+    """
+
+    def __init__(self, report_path, interval, batch_size, traces=()):
+        self.dir = os.path.splitext(report_path)[0] + "-live"
+        self.traces = traces
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pending = []
+        self.seq = 0
+        self.last_flush = time.monotonic()
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir)
+
+    @property
+    def src(self):
+        return os.path.basename(self.dir)
+
+    def add(self, feature_name, scenario_result):
+        row = _scenario_row(feature_name, scenario_result, traces=self.traces)
+        self.pending.append(f"reportLive.push({_json_for_html(row)});\n")
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def maybe_flush(self):
+        if self.pending and time.monotonic() - self.last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.seq += 1
+            path = os.path.join(self.dir, f"{self.seq:06d}.js")
+            # 先写临时文件再改名，页面不会读到写了一半的分片
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.writelines(self.pending)
+            os.replace(path + ".tmp", path)
+            self.pending = []
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        # 最终报告是自包含的，不再需要分片
+        self.pending = []
+        shutil.rmtree(self.dir, ignore_errors=True)
 
 
 def pytest_sessionstart(session):
     if not hasattr(session.config, "workerinput"):
-        global _master_report_data
-        _master_report_data = TestSessionReport()
+        global _master_report_data, _live_report
+        _master_report_data = TestSessionReport(db_path=report_options["db_path"])
+        if report_options["spool"]:
+            # 清掉上一次运行留下的 spool 文件 (Worker 此时还未启动)
+            shutil.rmtree(_spool_dir(), ignore_errors=True)
+
+        if report_options["live"]:
+            _live_report = LiveReportWriter(report_options["report_path"], report_options["live_interval"],
+                                            report_options["live_batch"], traces=_master_report_data.traces)
+            # 先写出一个空的 report.html，随后由页面轮询新的结果分片刷新
+            generate_html_report(_master_report_data, live=_live_report)
+
+
+# 场景结果等到 teardown 报告到达 (三个阶段的耗时都已知) 才加入报告: nodeid -> [report]
+_pending_reports = {}
+
+
+def _add_pending_results(nodeid):
+    for report in _pending_reports.pop(nodeid, ()):
+        scenario_result = _master_report_data.add_result(report)
+        if _live_report is not None:
+            _live_report.add(report.feature_name, scenario_result)
 
 
 def pytest_runtest_logreport(report):
@@ -311,7 +1413,15 @@ def pytest_runtest_logreport(report):
     if report.when == "call" or (report.when in ["setup", "teardown"] and report.outcome == "failed"):
 
         if hasattr(report, "feature_name"):
-            _master_report_data.add_result(report)
+            _pending_reports.setdefault(report.nodeid, []).append(report)
+
+    _master_report_data.record_phase(report)
+    if report.when == "teardown":
+        _add_pending_results(report.nodeid)
+        _master_report_data.record_plugin_cache(report)
+
+    if _live_report is not None:
+        _live_report.maybe_flush()
 
 
 def pytest_sessionfinish(session, exitstatus):
@@ -319,31 +1429,36 @@ def pytest_sessionfinish(session, exitstatus):
     会话结束时触发。
     仅在 Master 节点生成最终的 HTML 报告。
     """
+    # Worker 与 Master 都要等后台截图处理完成
+    _drain_screenshot_jobs()
+
     if not hasattr(session.config, "workerinput"):
         global _master_report_data
         if _master_report_data:
-            # 计算总耗时
-            _master_report_data.duration = round(time.time() - _master_report_data.start_time, 2)
-
-            # 统计 Feature 维度的数据 (Pass/Fail/Error/Skip)
-            _master_report_data.feature_total = len(_master_report_data.features)
-            for f_name, f_data in _master_report_data.features.items():
-                stats = f_data["stats"]
-                if stats["failed"] > 0:
-                    f_data["status"] = "failed"
-                    _master_report_data.feature_failed += 1
-                elif stats["error"] > 0:
-                    f_data["status"] = "error"
-                    _master_report_data.feature_error += 1
-                elif stats["skipped"] == stats["total"] and stats["total"] > 0:
-                    f_data["status"] = "skipped"
-                    _master_report_data.feature_skipped += 1
-                else:
-                    f_data["status"] = "passed"
-                    _master_report_data.feature_passed += 1
+            # 会话中断时可能有等不到 teardown 的结果
+            for nodeid in list(_pending_reports):
+                _add_pending_results(nodeid)
+            _master_report_data.finalize()
+
+            if report_options["history_path"]:
+                # 历史库出问题不能影响报告生成
+                try:
+                    history = DurationHistory(report_options["history_path"])
+                    try:
+                        _master_report_data.regressions = history.record_run(_master_report_data)
+                    finally:
+                        history.close()
+                except (sqlite3.Error, OSError) as e:
+                    print(f"Warning: Failed to update duration history {report_options['history_path']}: {e}")
 
             # 调用生成函数
             generate_html_report(_master_report_data)
+            if report_options["dump_path"]:
+                _master_report_data.dump(report_options["dump_path"])
+            if _live_report is not None:
+                _live_report.close()
+            if _master_report_data.store is not None:
+                _master_report_data.store.close()
 
 
 
@@ -359,9 +1474,16 @@ HTML_TEMPLATE = """
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Automation Test Report</title>
+    <title>{% if page and page.kind == "feature" %}{{ page.name | e }} - {% endif %}Automation Test Report</title>
+    {% if page and page.kind == "feature" %}
+    <!-- 分页报告的 Feature 页在子目录中，相对链接 (截图等) 仍以报告目录为准 -->
+    <base href="../">
+    {% endif %}
+    {% if offline %}
+    <style>{{ vendor_css }}</style>
+    {% else %}
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <script src="https://cdn.jsdelivr.net/npm/echarts@5.4.3/dist/echarts.min.js"></script>
+    {% endif %}
     <style>
         body { background-color: #f4f6f9; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; }
         .container-fluid { padding: 20px; max-width: 1600px; }
@@ -419,6 +1541,16 @@ HTML_TEMPLATE = """
             border-radius: 2px;
         }
         .log-line { display: block; white-space: pre-wrap; line-height: 1.4; }
+        .cluster-trace { max-height: 300px; overflow: auto; font-size: 0.8em; background: #f8f9fa; padding: 8px; margin: 6px 0 0; }
+        .phase-line { margin-bottom: 8px; }
+        .analytics-scroll { max-height: 360px; overflow: auto; }
+        .timeline-canvas { display: block; width: 100%; }
+        .sparkline { vertical-align: middle; max-width: 100%; }
+        .is-invalid { border-color: #dc3545 !important; }
+        .step-duration { font-size: 0.85em; color: #6c757d; margin-right: 6px; }
+        .step-timeline { position: relative; height: 14px; background: #f1f3f5; border-radius: 3px; margin-bottom: 8px; overflow: hidden; }
+        .step-segment { position: absolute; top: 0; bottom: 0; border-right: 1px solid #fff; opacity: 0.85; }
+        .step-segment:hover { opacity: 1; }
 
         /* === SCREENSHOT & MODAL STYLES === */
         .screenshot-box { 
@@ -472,7 +1604,27 @@ HTML_TEMPLATE = """
         .close:hover, .close:focus { color: #bbb; text-decoration: none; cursor: pointer; }
 
         .chart-container { height: 350px; }
+        .svg-chart { display: flex; flex-direction: column; align-items: center; justify-content: center; }
+        .svg-legend { display: flex; gap: 14px; margin-top: 12px; font-size: 0.85em; color: #555; }
+        .svg-legend i { display: inline-block; width: 10px; height: 10px; border-radius: 2px; margin-right: 4px; }
         .btn-filter.active { box-shadow: inset 0 3px 5px rgba(0,0,0,0.125); }
+
+        /* === VIRTUAL SCENARIO TABLE === */
+        .vt-header { display: flex; background-color: #343a40; color: white; font-weight: 500; padding-right: 15px; }
+        .vt-viewport { position: relative; height: 75vh; overflow-y: scroll; }
+        .vt-spacer { position: relative; width: 100%; }
+        .vt-row { position: absolute; left: 0; right: 0; display: flex; align-items: center; border-bottom: 1px solid #dee2e6; background-color: #fff; }
+        .vt-row.scenario-row:hover { background-color: #f5f5f5; }
+        .vt-row.details-row { display: flow-root; border-bottom: none; }
+        .vt-cell { padding: 8px; min-width: 0; }
+        .vt-name { flex: 0 0 50%; }
+        .vt-status { flex: 0 0 15%; }
+        .vt-duration { flex: 0 0 15%; }
+        .vt-action { flex: 0 0 20%; }
+        .vt-scenario-name { padding-left: 40px; }
+        .vt-ellipsis { white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+        .vt-nodeid { font-size: 0.8em; }
+        .row-thumb { height: 40px; max-width: 72px; margin-left: 10px; border: 1px solid #ccc; border-radius: 3px; cursor: zoom-in; object-fit: cover; }
     </style>
 </head>
 <body>
@@ -481,27 +1633,34 @@ HTML_TEMPLATE = """
     <div class="card">
         <div class="card-body py-2">
             <div class="row align-items-center text-secondary small">
+                {% if page and page.kind == "feature" %}
+                <div class="col-auto"><a href="{{ page.index_url | e }}">&larr; All features</a> <strong class="ms-2">{{ page.name | e }}</strong></div>
+                {% endif %}
                 <div class="col-auto"><strong>Python:</strong> {{ env.python_version }}</div>
                 <div class="col-auto"><strong>Platform:</strong> {{ env.platform }}</div>
                 <div class="col-auto"><strong>Start:</strong> {{ env.start_time }}</div>
                 <div class="col-auto"><strong>Duration:</strong> {{ env.duration }}s</div>
+                <div class="col-auto"><strong>Plugin cache:</strong> {{ env.plugin_cache }}</div>
+                <div class="col-auto text-primary fw-bold" id="live-status"></div>
             </div>
         </div>
     </div>
 
+    <!-- 汇总统计和环形图是整次运行的，只放在首页；Feature 页的统计在 Feature 列表里 -->
+    {% if not page or page.kind != "feature" %}
     <div class="row">
         <div class="col-md-6">
             <div class="card h-100">
                 <div class="card-header">Feature Statistics</div>
                 <div class="card-body">
                     <div class="row g-2 mb-3">
-                        <div class="col"><div class="summary-box bg-primary"><h3>{{ stats.feature_total }}</h3><small>Total</small></div></div>
-                        <div class="col"><div class="summary-box bg-pass"><h3>{{ stats.feature_passed }}</h3><small>Pass</small></div></div>
-                        <div class="col"><div class="summary-box bg-fail"><h3>{{ stats.feature_failed }}</h3><small>Fail</small></div></div>
-                        <div class="col"><div class="summary-box bg-error"><h3>{{ stats.feature_error }}</h3><small>Error</small></div></div>
-                        <div class="col"><div class="summary-box bg-skip"><h3>{{ stats.feature_skipped }}</h3><small>Skip</small></div></div>
+                        <div class="col"><div class="summary-box bg-primary"><h3 id="stat-feature_total">{{ stats.feature_total }}</h3><small>Total</small></div></div>
+                        <div class="col"><div class="summary-box bg-pass"><h3 id="stat-feature_passed">{{ stats.feature_passed }}</h3><small>Pass</small></div></div>
+                        <div class="col"><div class="summary-box bg-fail"><h3 id="stat-feature_failed">{{ stats.feature_failed }}</h3><small>Fail</small></div></div>
+                        <div class="col"><div class="summary-box bg-error"><h3 id="stat-feature_error">{{ stats.feature_error }}</h3><small>Error</small></div></div>
+                        <div class="col"><div class="summary-box bg-skip"><h3 id="stat-feature_skipped">{{ stats.feature_skipped }}</h3><small>Skip</small></div></div>
                     </div>
-                    <div id="chart-features" class="chart-container"></div>
+                    <div id="chart-features" class="chart-container svg-chart">{{ charts.features }}</div>
                 </div>
             </div>
         </div>
@@ -510,169 +1669,266 @@ HTML_TEMPLATE = """
                 <div class="card-header">Test Case Statistics</div>
                 <div class="card-body">
                     <div class="row g-2 mb-3">
-                        <div class="col"><div class="summary-box bg-primary"><h3>{{ stats.total }}</h3><small>Total</small></div></div>
-                        <div class="col"><div class="summary-box bg-pass"><h3>{{ stats.passed }}</h3><small>Pass</small></div></div>
-                        <div class="col"><div class="summary-box bg-fail"><h3>{{ stats.failed }}</h3><small>Fail</small></div></div>
-                        <div class="col"><div class="summary-box bg-error"><h3>{{ stats.error }}</h3><small>Error</small></div></div>
-                        <div class="col"><div class="summary-box bg-skip"><h3>{{ stats.skipped }}</h3><small>Skip</small></div></div>
+                        <div class="col"><div class="summary-box bg-primary"><h3 id="stat-total">{{ stats.total }}</h3><small>Total</small></div></div>
+                        <div class="col"><div class="summary-box bg-pass"><h3 id="stat-passed">{{ stats.passed }}</h3><small>Pass</small></div></div>
+                        <div class="col"><div class="summary-box bg-fail"><h3 id="stat-failed">{{ stats.failed }}</h3><small>Fail</small></div></div>
+                        <div class="col"><div class="summary-box bg-error"><h3 id="stat-error">{{ stats.error }}</h3><small>Error</small></div></div>
+                        <div class="col"><div class="summary-box bg-skip"><h3 id="stat-skipped">{{ stats.skipped }}</h3><small>Skip</small></div></div>
                     </div>
-                    <div id="chart-cases" class="chart-container"></div>
+                    <div id="chart-cases" class="chart-container svg-chart">{{ charts.cases }}</div>
                 </div>
             </div>
         </div>
     </div>
+    {% endif %}
 
+    {% if timeline_workers %}
     <div class="card">
-        <div class="card-header d-flex flex-wrap justify-content-between align-items-center">
-            <span class="mb-2 mb-md-0">Test Details</span>
-            <div class="d-flex gap-2 align-items-center">
-                <select id="markerFilter" class="form-select form-select-sm" style="width: 150px;" onchange="applyFilter()">
-                    <option value="all">All Markers</option>
-                    {% for m in all_markers %}
-                    <option value="{{ m }}">{{ m }}</option>
+        <div class="card-header">
+            Worker Timeline <small class="text-muted fw-normal ms-2">setup / call / teardown of every test, per worker</small>
+        </div>
+        <div class="card-body">
+            <canvas id="timeline-canvas" class="timeline-canvas"></canvas>
+            <table class="table table-sm mb-0 mt-2">
+                <thead>
+                    <tr><th>Worker</th><th>Tests</th><th>Busy (s)</th><th>Idle (s)</th><th>Finished at (s)</th><th>Behind last (s)</th></tr>
+                </thead>
+                <tbody>
+                    {% for w in timeline_workers %}
+                    <tr>
+                        <td>{{ w.name | e }}</td>
+                        <td>{{ w.tests }}</td>
+                        <td>{{ w.busy }}</td>
+                        <td>{{ w.idle }}</td>
+                        <td{% if w.lag == 0 and timeline_workers | length > 1 %} class="text-fail fw-bold"{% endif %}>{{ w.finished }}</td>
+                        <td>{{ w.lag }}</td>
+                    </tr>
                     {% endfor %}
-                </select>
-                <div class="input-group input-group-sm" style="width: 250px;">
-                    <span class="input-group-text bg-white fw-bold">Search</span>
-                    <input type="text" id="searchInput" class="form-control" placeholder="Name..." onkeyup="applyFilter()">
-                </div>
-                <div class="btn-group btn-group-sm" role="group">
-                    <button type="button" class="btn btn-outline-secondary btn-filter active" onclick="setFilterStatus('all')">TOTAL</button>
-                    <button type="button" class="btn btn-outline-success btn-filter" onclick="setFilterStatus('passed')">PASSED</button>
-                    <button type="button" class="btn btn-outline-danger btn-filter" onclick="setFilterStatus('failed')">FAILED</button>
-                    <button type="button" class="btn btn-outline-warning btn-filter" onclick="setFilterStatus('error')">ERROR</button>
-                    <button type="button" class="btn btn-outline-secondary btn-filter" onclick="setFilterStatus('skipped')">SKIPPED</button>
-                </div>
-            </div>
+                </tbody>
+            </table>
         </div>
+    </div>
+    {% endif %}
 
+    {% if phase_costs %}
+    <div class="card">
+        <div class="card-header">
+            Setup / Teardown Cost
+            <small class="text-muted fw-normal ms-2">
+                {% for p in phase_costs %}{{ p.name }} {{ p.total }}s ({{ p.share }}%){% if not loop.last %} &middot; {% endif %}{% endfor %}
+            </small>
+        </div>
+        {% if fixture_costs %}
         <div class="card-body p-0">
-            <table class="table table-hover mb-0" id="result-table">
+            <table class="table table-sm mb-0">
                 <thead>
+                    <tr><th>Fixture</th><th>Scope</th><th>Setups</th><th>Total (s)</th><th>Avg (s)</th><th>Max (s)</th><th>Share of test time</th></tr>
+                </thead>
+                <tbody>
+                    {% for f in fixture_costs %}
                     <tr>
-                        <th style="width: 50%">Feature / Scenario</th>
-                        <th style="width: 15%">Status</th>
-                        <th style="width: 15%">Duration (s)</th>
-                        <th style="width: 20%">Action</th>
+                        <td>{{ f.name | e }}</td>
+                        <td>{{ f.scope }}</td>
+                        <td>{{ f.count }}</td>
+                        <td class="fw-bold">{{ f.total }}</td>
+                        <td>{{ f.avg }}</td>
+                        <td>{{ f.max }}</td>
+                        <td>{{ f.share }}%</td>
                     </tr>
+                    {% endfor %}
+                </tbody>
+            </table>
+        </div>
+        {% endif %}
+    </div>
+    {% endif %}
+
+    {% if regressions %}
+    <div class="card">
+        <div class="card-header">
+            Duration Regressions <span class="badge bg-fail">{{ regressions | length }}</span>
+            <small class="text-muted fw-normal ms-2">compared with the median of the last {{ regression_window }} passing runs</small>
+        </div>
+        <div class="card-body p-0">
+            <table class="table table-sm mb-0">
+                <thead>
+                    <tr><th>Scenario</th><th>Duration (s)</th><th>Median (s)</th><th>MAD (s)</th><th>Change</th><th>Score</th></tr>
                 </thead>
                 <tbody>
-                    {% for feature_name, feature in features %}
-                    <tr class="feature-row status-{{ feature.status }}" 
-                        data-feature-name="{{ feature_name | lower }}"
-                        data-bs-toggle="collapse" data-bs-target="#collapse-{{ loop.index }}">
-                        <td><strong>{{ feature_name }}</strong></td>
+                    {% for r in regressions %}
+                    <tr>
+                        <td>{{ r.name | e }}<div class="text-muted small">{{ r.nodeid | e }}</div></td>
+                        <td class="text-fail fw-bold">{{ r.duration }}</td>
+                        <td>{{ r.median }}</td>
+                        <td>{{ r.mad }}</td>
+                        <td>{% if r.change is not none %}+{{ r.change }}%{% else %}-{% endif %}</td>
+                        <td>{{ r.score }} <small class="text-muted">(n={{ r.samples }})</small></td>
+                    </tr>
+                    {% endfor %}
+                </tbody>
+            </table>
+        </div>
+    </div>
+    {% endif %}
+
+    {% if failure_clusters %}
+    <div class="card">
+        <div class="card-header">
+            Failure Clusters <span class="badge bg-fail">{{ failure_clusters | length }}</span>
+            <small class="text-muted fw-normal ms-2">failures grouped by normalized traceback</small>
+        </div>
+        <div class="card-body p-0">
+            <table class="table table-sm mb-0">
+                <thead>
+                    <tr><th>Count</th><th>Failure</th><th>Scenarios</th></tr>
+                </thead>
+                <tbody>
+                    {% for c in failure_clusters %}
+                    <tr>
+                        <td class="text-fail fw-bold">{{ c.count }}</td>
+                        <td>
+                            <details>
+                                <summary>{{ c.summary | e }} <small class="text-muted">#{{ c.signature }}</small></summary>
+                                <pre class="cluster-trace">{{ c.trace | e }}</pre>
+                            </details>
+                        </td>
                         <td>
-                            {% if feature.status == 'passed' %} <span class="badge bg-pass">ALL PASS</span>
-                            {% elif feature.status == 'skipped' %} <span class="badge bg-skip">SKIPPED</span>
-                            {% else %}
-                                <span class="badge bg-danger">
-                                    P:{{ feature.stats.passed }} F:{{ feature.stats.failed }} E:{{ feature.stats.error }} S:{{ feature.stats.skipped }}
-                                </span>
-                            {% endif %}
+                            {% for ex in c.examples %}<div class="small">{{ ex.name | e }}</div>{% endfor %}
+                            {% if c.count > c.examples | length %}<div class="text-muted small">and {{ c.count - c.examples | length }} more</div>{% endif %}
                         </td>
-                        <td>-</td>
-                        <td><small class="text-muted">Expand/Collapse</small></td>
                     </tr>
+                    {% endfor %}
+                </tbody>
+            </table>
+        </div>
+    </div>
+    {% endif %}
 
-                    <tr class="collapse show" id="collapse-{{ loop.index }}">
-                        <td colspan="4" class="p-0">
-                            <table class="table mb-0 table-borderless bg-white">
-                                {% for scenario in feature.scenarios %}
-                                <tr class="scenario-row status-{{ scenario.status }}" 
-                                    data-scenario-name="{{ scenario.name | lower }}"
-                                    data-feature-parent="{{ feature_name | lower }}"
-                                    data-markers="{{ scenario.markers | join(' ') }}">
-
-                                    <td style="width: 50%; padding-left: 40px;">
-                                        {{ scenario.name }}
-                                        {% for m in scenario.markers %}
-                                            <span class="badge bg-secondary marker-badge">{{ m }}</span>
-                                        {% endfor %}
-                                        <div class="text-muted small" style="font-size: 0.8em;">{{ scenario.nodeid }}</div>
-                                    </td>
-                                    <td style="width: 15%">
-                                        <span class="status-badge 
-                                            {% if scenario.status == 'passed' %}bg-pass
-                                            {% elif scenario.status == 'failed' %}bg-fail
-                                            {% elif scenario.status == 'error' %}bg-error
-                                            {% else %}bg-skip{% endif %}">
-                                            {{ scenario.status|upper }}
-                                        </span>
-                                    </td>
-                                    <td style="width: 15%">{{ scenario.duration }}s</td>
-                                    <td style="width: 20%">
-                                        <button id="btn-details-{{ loop.index }}-{{ scenario.nodeid|hash }}"
-                                                class="btn btn-sm btn-outline-secondary" style="font-size: 0.8em;" 
-                                                onclick="toggleDetails('{{ loop.index }}-{{ scenario.nodeid|hash }}')">
-                                            Details Expand
-                                        </button>
-                                    </td>
+    {% if duration_overall %}
+    <div class="card">
+        <div class="card-header">
+            Duration Analytics
+            <small class="text-muted fw-normal ms-2">
+                {{ duration_overall.count }} scenarios (skipped excluded) &middot;
+                p50 {{ duration_overall.quantiles[0] }}s &middot; p90 {{ duration_overall.quantiles[1] }}s &middot;
+                p99 {{ duration_overall.quantiles[2] }}s
+            </small>
+        </div>
+        <div class="card-body">
+            <div class="row g-2">
+                <div class="col-md-6">
+                    <h6>Slowest Scenarios</h6>
+                    <div class="analytics-scroll">
+                        <table class="table table-sm mb-0">
+                            <thead>
+                                <tr><th>Scenario</th><th>Feature</th><th>Status</th><th>Duration (s)</th></tr>
+                            </thead>
+                            <tbody>
+                                {% for s in slowest_scenarios %}
+                                <tr>
+                                    <td title="{{ s.nodeid | e }}">{{ s.name | e }}</td>
+                                    <td>{{ s.feature | e }}</td>
+                                    <td><span class="badge {{ 'bg-pass' if s.status == 'passed' else ('bg-error' if s.status == 'error' else 'bg-fail') }}">{{ s.status | upper }}</span></td>
+                                    <td class="fw-bold">{{ s.duration }}</td>
                                 </tr>
-
-                                <tr class="details-row" id="details-row-{{ loop.index }}-{{ scenario.nodeid|hash }}" style="display:none; border-top: none;">
-                                    <td colspan="4" class="p-0">
-                                        {% if scenario.steps %}
-                                        <div class="step-container" style="display: block;">
-                                            <h6 class="border-bottom pb-2">Execution Steps</h6>
-                                            {% for step in scenario.steps %}
-                                            <div class="step-item">
-                                                <div class="step-keyword">{{ step.keyword }}</div>
-                                                <div class="step-content">
-                                                    <div class="step-name">{{ step.name }}</div>
-                                                    {% if step.logs %}
-                                                    <div class="step-logs">
-                                                        {% for log in step.logs %}
-                                                        <span class="log-line">{{ log }}</span>
-                                                        {% endfor %}
-                                                    </div>
-                                                    {% endif %}
-                                                </div>
-                                                <div class="step-status">
-                                                    {% if step.status == 'passed' %}
-                                                        <span class="badge bg-pass">PASS</span>
-                                                    {% elif step.status == 'failed' %}
-                                                        <span class="badge bg-fail">FAIL</span>
-                                                        <div class="text-danger small mt-1">{{ step.error }}</div>
-                                                    {% endif %}
-                                                </div>
-                                            </div>
-                                            {% endfor %}
-                                        </div>
-                                        {% endif %}
-
-                                        <div class="log-box" style="display: block;">
-                                            <div>{{ scenario.log | e }}</div>
-                                            {% if scenario.status in ['failed', 'error'] %}
-                                            <div class="screenshot-box">
-                                                <h6>Failure Screenshot</h6>
-                                                {% if scenario.screenshot %}
-                                                    <div>
-                                                        <img src="data:image/png;base64,{{ scenario.screenshot }}" 
-                                                             class="screenshot-img" 
-                                                             onclick="showImage(this.src)" 
-                                                             alt="Failure Screenshot" />
-                                                        <div class="small text-muted mt-1">Click image to enlarge</div>
-                                                    </div>
-                                                {% else %}
-                                                    <div class="alert alert-light border border-warning text-warning mt-2">
-                                                        <small>No screenshot captured (Check 'driver' or 'page' fixture).</small>
-                                                    </div>
-                                                {% endif %}
-                                            </div>
-                                            {% endif %}
-                                        </div>
-                                    </td>
+                                {% endfor %}
+                            </tbody>
+                        </table>
+                    </div>
+                </div>
+                <div class="col-md-6">
+                    <h6>Percentiles <small class="text-muted fw-normal">(approximate, t-digest)</small></h6>
+                    <div class="analytics-scroll">
+                        <table class="table table-sm mb-0">
+                            <thead>
+                                <tr><th>Feature / Marker</th><th>Runs</th><th>Total (s)</th><th>Share</th><th>p50</th><th>p90</th><th>p99</th></tr>
+                            </thead>
+                            <tbody>
+                                {% for group, rows in (("Feature", duration_features), ("Marker", duration_markers)) %}
+                                {% for r in rows %}
+                                <tr>
+                                    <td>{% if group == "Marker" %}<span class="badge bg-secondary">{{ r.name | e }}</span>{% else %}{{ r.name | e }}{% endif %}</td>
+                                    <td>{{ r.count }}</td>
+                                    <td class="fw-bold">{{ r.total }}</td>
+                                    <td>{% if group == "Feature" %}{{ r.share }}%{% endif %}</td>
+                                    <td>{{ r.quantiles[0] }}</td>
+                                    <td>{{ r.quantiles[1] }}</td>
+                                    <td>{{ r.quantiles[2] }}</td>
                                 </tr>
                                 {% endfor %}
-                            </table>
-                        </td>
+                                {% endfor %}
+                            </tbody>
+                        </table>
+                    </div>
+                </div>
+            </div>
+        </div>
+    </div>
+    {% endif %}
+
+    {% if slowest_steps %}
+    <div class="card">
+        <div class="card-header">Slowest Steps <small class="text-muted fw-normal ms-2">total time across all scenarios</small></div>
+        <div class="card-body p-0">
+            <table class="table table-sm mb-0">
+                <thead>
+                    <tr><th>Step</th><th>Runs</th><th>Total (s)</th><th>Avg (s)</th><th>Max (s)</th></tr>
+                </thead>
+                <tbody>
+                    {% for step in slowest_steps %}
+                    <tr>
+                        <td>{{ step.name | e }}</td>
+                        <td>{{ step.count }}</td>
+                        <td class="fw-bold">{{ step.total }}</td>
+                        <td>{{ step.avg }}</td>
+                        <td>{{ step.max }}</td>
                     </tr>
                     {% endfor %}
                 </tbody>
             </table>
         </div>
     </div>
+    {% endif %}
+
+    <div class="card">
+        <div class="card-header d-flex flex-wrap justify-content-between align-items-center">
+            <span class="mb-2 mb-md-0">{% if page and page.kind == "index" %}Features{% else %}Test Details{% endif %}</span>
+            <div class="d-flex gap-2 align-items-center">
+                <input type="text" id="markerFilter" class="form-control form-control-sm" list="marker-list"
+                       style="width: 230px;{% if page and page.kind == "index" %} display: none;{% endif %}"
+                       placeholder="Markers, e.g. smoke and not p3" oninput="scheduleFilter()">
+                <datalist id="marker-list">
+                    {% for m in all_markers %}
+                    <option value="{{ m | e }}">
+                    {% endfor %}
+                </datalist>
+                <div class="input-group input-group-sm" style="width: 250px;">
+                    <span class="input-group-text bg-white fw-bold">Search</span>
+                    <input type="text" id="searchInput" class="form-control" placeholder="Name, nodeid, step or log..." oninput="scheduleFilter()">
+                </div>
+                <div class="btn-group btn-group-sm" role="group">
+                    <button type="button" class="btn btn-outline-secondary btn-filter active" onclick="setFilterStatus('all')">TOTAL</button>
+                    <button type="button" class="btn btn-outline-success btn-filter" onclick="setFilterStatus('passed')">PASSED</button>
+                    <button type="button" class="btn btn-outline-danger btn-filter" onclick="setFilterStatus('failed')">FAILED</button>
+                    <button type="button" class="btn btn-outline-warning btn-filter" onclick="setFilterStatus('error')">ERROR</button>
+                    <button type="button" class="btn btn-outline-secondary btn-filter" onclick="setFilterStatus('skipped')">SKIPPED</button>
+                </div>
+            </div>
+        </div>
+
+        <div class="card-body p-0">
+            <div class="vt-header">
+                <div class="vt-cell vt-name">Feature / Scenario</div>
+                <div class="vt-cell vt-status">Status</div>
+                <div class="vt-cell vt-duration">Duration (s)</div>
+                <div class="vt-cell vt-action">Action</div>
+            </div>
+            <div id="vt-viewport" class="vt-viewport">
+                <div id="vt-spacer" class="vt-spacer"></div>
+            </div>
+            <div id="vt-empty" class="text-center text-muted p-4" style="display: none;">No matching scenarios</div>
+        </div>
+    </div>
 </div>
 
 <!-- Image Modal -->
@@ -681,50 +1937,257 @@ HTML_TEMPLATE = """
     <img class="modal-content" id="modalImg">
 </div>
 
-<script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
+<!-- Scenario data island: rows are rendered on demand by the virtual scroller below -->
+<script type="application/json" id="report-data"{% if compress %} data-encoding="gzip"{% endif %}>{% for chunk in report_data %}{{ chunk }}{% endfor %}</script>
 <script>
-    var chartFeatures = echarts.init(document.getElementById('chart-features'));
-    var optionFeatures = {
-        tooltip: { trigger: 'item' },
-        legend: { bottom: '0%' },
-        color: ['#28a745', '#dc3545', '#fd7e14', '#6c757d'],
-        series: [{
-            name: 'Feature Status', type: 'pie', radius: ['40%', '70%'],
-            avoidLabelOverlap: false, itemStyle: { borderRadius: 5, borderColor: '#fff', borderWidth: 2 },
-            label: { show: false, position: 'center' },
-            emphasis: { label: { show: true, fontSize: '20', fontWeight: 'bold' } },
-            data: [
-                { value: {{ stats.feature_passed }}, name: 'Passed' },
-                { value: {{ stats.feature_failed }}, name: 'Failed' },
-                { value: {{ stats.feature_error }}, name: 'Error' },
-                { value: {{ stats.feature_skipped }}, name: 'Skipped' }
-            ]
-        }]
-    };
-    chartFeatures.setOption(optionFeatures);
-
-    var chartCases = echarts.init(document.getElementById('chart-cases'));
-    var optionCases = {
-        tooltip: { trigger: 'item' },
-        legend: { bottom: '0%' },
-        color: ['#28a745', '#dc3545', '#fd7e14', '#6c757d'],
-        series: [{
-            name: 'Case Status', type: 'pie', radius: ['40%', '70%'],
-            itemStyle: { borderRadius: 5, borderColor: '#fff', borderWidth: 2 },
-            data: [
-                { value: {{ stats.passed }}, name: 'Passed' },
-                { value: {{ stats.failed }}, name: 'Failed' },
-                { value: {{ stats.error }}, name: 'Error' },
-                { value: {{ stats.skipped }}, name: 'Skipped' }
-            ]
-        }]
-    };
-    chartCases.setOption(optionCases);
+    // ===== Scenario table (virtual scroller over the data island) =====
+    var FEATURE_ROW_HEIGHT = 44;
+    var SCENARIO_ROW_HEIGHT = 58;
+    var DETAILS_ESTIMATED_HEIGHT = 320;
+    var OVERSCAN = 8;
+
+    function indexFields(names) {
+        var idx = {};
+        names.forEach(function(name, i) { idx[name] = i; });
+        return idx;
+    }
 
-    window.addEventListener('resize', function() {
-        chartFeatures.resize();
-        chartCases.resize();
-    });
+    // 数据岛可能是 gzip + base64 压缩的 (--report-compress)，由浏览器 DecompressionStream 解压
+    function loadReportData() {
+        var node = document.getElementById('report-data');
+        if (node.getAttribute('data-encoding') !== 'gzip') {
+            return Promise.resolve(JSON.parse(node.textContent));
+        }
+        var binary = atob(node.textContent.trim());
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+        var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+        return new Response(stream).text().then(JSON.parse);
+    }
+
+    var REPORT = null;
+    var F, SF, features, scenarios, featureScenarios, searchKeys;
+    // 分页报告的首页只有 Feature 列表，点击跳转到各 Feature 页
+    var PAGES = null;
+    var visibleFeatures = null;
+
+    function initData(data) {
+        REPORT = data;
+        F = indexFields(REPORT.fields);
+        SF = indexFields(REPORT.stepFields);
+        features = REPORT.features;
+        scenarios = REPORT.scenarios;
+        PAGES = REPORT.pages || null;
+        markerNames = REPORT.markers || [];
+        markerNames.forEach(function(name, bit) { markerBit[name] = bit; });
+
+        searchIndex = REPORT.search || { count: 0, tokens: [], postings: [] };
+        featureScenarios = features.map(function() { return []; });
+        // 子串匹配用的 searchKeys 在第一次搜索时才逐行生成
+        searchKeys = new Array(scenarios.length);
+        scenarios.forEach(function(row, i) {
+            featureScenarios[row[F.feature]].push(i);
+        });
+        visibleByFeature = featureScenarios;
+    }
+
+    var viewport = document.getElementById('vt-viewport');
+    var spacer = document.getElementById('vt-spacer');
+
+    var visibleByFeature = [];
+    var collapsedFeatures = {};
+    var expandedScenarios = {};
+    var detailHeights = {};
+    var items = [];         // 当前可见的行: ['f', featureIdx] / ['s', scenarioIdx] / ['d', scenarioIdx]
+    var offsets = new Float64Array(1);
+    var mounted = {};       // 已挂载到 DOM 的行节点, key = type + index
+    var renderPending = false;
+
+    // ===== Search: prefix lookup in the prebuilt inverted index =====
+    var SEARCH_TOKEN = /[a-z0-9_]+|[^\\x00-\\x7f\\s]/g;
+    var searchIndex = null;
+    var decodedPostings = {};
+    var filterTimer = null;
+
+    function scheduleFilter() {
+        clearTimeout(filterTimer);
+        filterTimer = setTimeout(applyFilter, 150);
+    }
+
+    function postingList(k) {
+        var list = decodedPostings[k];
+        if (!list) {
+            var deltas = searchIndex.postings[k];
+            list = decodedPostings[k] = new Int32Array(deltas.length);
+            var acc = 0;
+            for (var j = 0; j < deltas.length; j++) { acc += deltas[j]; list[j] = acc; }
+        }
+        return list;
+    }
+
+    function lowerBound(tokens, value) {
+        var lo = 0, hi = tokens.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (tokens[mid] < value) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
+
+    // 索引里的 token 最多 40 个字符 (与 _tokenize 一致)：更长的查询词先用前 40 个字符查表，再逐行核对全文
+    var TOKEN_LIMIT = 40;
+
+    // 场景名 + nodeid + Feature 名，用于子串匹配，按需生成
+    function searchKey(i) {
+        var key = searchKeys[i];
+        if (key === undefined) {
+            var row = scenarios[i];
+            key = searchKeys[i] = (row[F.name] + '\\n' + row[F.nodeid] + '\\n' + features[row[F.feature]].name).toLowerCase();
+        }
+        return key;
+    }
+
+    // 与 _row_tokens 分词的内容相同：场景名、日志、步骤名、步骤错误和日志、trace
+    function rowText(i) {
+        var row = scenarios[i];
+        var parts = [row[F.name], row[F.log] || ''];
+        row[F.steps].forEach(function(step) {
+            parts.push(step[SF.name] || '', step[SF.error] || '');
+            step[SF.logs].forEach(function(line) { parts.push(line); });
+        });
+        var trace = row[F.trace];
+        if (typeof trace === 'number') trace = REPORT.traces[trace];
+        if (trace) parts.push(trace);
+        return parts.join('\\n').toLowerCase();
+    }
+
+    // 每个查询词按前缀匹配索引 token，各词结果取交集；
+    // 另外，场景名、nodeid 或 Feature 名中任意位置包含整个查询 (例如 nodeid 的一段) 的场景也命中
+    function searchMatches(term) {
+        var result = null;
+        var queryTokens = term.match(SEARCH_TOKEN) || [];
+        var longTokens = [];
+        queryTokens.forEach(function(token) {
+            var marks = new Uint8Array(scenarios.length);
+            var tokens = searchIndex.tokens;
+            var prefix = token;
+            if (token.length > TOKEN_LIMIT) {
+                prefix = token.slice(0, TOKEN_LIMIT);
+                longTokens.push(token);
+            }
+            for (var k = lowerBound(tokens, prefix); k < tokens.length && tokens[k].lastIndexOf(prefix, 0) === 0; k++) {
+                var list = postingList(k);
+                for (var j = 0; j < list.length; j++) marks[list[j]] = 1;
+            }
+            for (var i = searchIndex.count; i < scenarios.length; i++) {
+                if (searchKey(i).indexOf(token) !== -1) marks[i] = 1;
+            }
+            if (result) {
+                for (var r = 0; r < result.length; r++) result[r] &= marks[r];
+            } else {
+                result = marks;
+            }
+        });
+        if (!result) result = new Uint8Array(scenarios.length);
+        if (longTokens.length) {
+            for (var c = 0; c < searchIndex.count; c++) {
+                if (!result[c]) continue;
+                var text = rowText(c);
+                result[c] = longTokens.every(function(t) { return text.indexOf(t) !== -1; }) ? 1 : 0;
+            }
+        }
+        for (var n = 0; n < scenarios.length; n++) {
+            if (!result[n] && searchKey(n).indexOf(term) !== -1) result[n] = 1;
+        }
+        return result;
+    }
+
+    // ===== Markers: one bitset per scenario (32-bit words, bit = index in REPORT.markers) =====
+    var markerNames = [];
+    var markerBit = {};
+    var markerSets = {};    // marker -> 场景位图 (第 i 位 = 场景 i)，按需构建并缓存
+
+    function scenarioMarkers(row) {
+        var names = [];
+        row[F.markers].forEach(function(word, w) {
+            for (var b = 0; b < 32; b++) {
+                if ((word >>> b) & 1) names.push(markerNames[w * 32 + b]);
+            }
+        });
+        return names;
+    }
+
+    // 实时模式的行带的是 marker 名字，收到时转换成位图，新 marker 追加到表尾
+    function encodeMarkers(names) {
+        if (names.length && typeof names[0] !== 'string') return names;
+        var words = [];
+        names.forEach(function(name) {
+            if (markerBit[name] === undefined) {
+                markerBit[name] = markerNames.length;
+                markerNames.push(name);
+            }
+            var bit = markerBit[name];
+            while (words.length <= bit >> 5) words.push(0);
+            words[bit >> 5] = (words[bit >> 5] | (1 << (bit & 31))) >>> 0;
+        });
+        return words;
+    }
+
+    function markerSet(name) {
+        if (markerSets[name]) return markerSets[name];
+        var set = new Uint32Array((scenarios.length + 31) >> 5);
+        var bit = markerBit[name];
+        if (bit !== undefined) {
+            var w = bit >> 5, mask = 1 << (bit & 31);
+            for (var i = 0; i < scenarios.length; i++) {
+                if ((scenarios[i][F.markers][w] & mask) !== 0) set[i >> 5] |= 1 << (i & 31);
+            }
+        }
+        return markerSets[name] = set;
+    }
+
+    // 解析 "smoke and not (p3 or p2)"，每个运算都是对整张场景位图做按位运算
+    function markerMatches(expr) {
+        var tokens = expr.match(/\\(|\\)|[^\\s()]+/g) || [];
+        var pos = 0;
+        function combine(a, b, op) {
+            var out = new Uint32Array(a.length);
+            for (var k = 0; k < a.length; k++) out[k] = op === 'and' ? a[k] & b[k] : a[k] | b[k];
+            return out;
+        }
+        function parseOr() {
+            var left = parseAnd();
+            while (tokens[pos] === 'or') { pos++; left = combine(left, parseAnd(), 'or'); }
+            return left;
+        }
+        function parseAnd() {
+            var left = parseNot();
+            while (tokens[pos] === 'and') { pos++; left = combine(left, parseNot(), 'and'); }
+            return left;
+        }
+        function parseNot() {
+            if (tokens[pos] === 'not') {
+                pos++;
+                var inner = parseNot();
+                var out = new Uint32Array(inner.length);
+                for (var k = 0; k < inner.length; k++) out[k] = ~inner[k];
+                return out;
+            }
+            var token = tokens[pos++];
+            if (token === '(') {
+                var value = parseOr();
+                if (tokens[pos++] !== ')') throw new Error('missing )');
+                return value;
+            }
+            if (token === undefined || token === ')' || token === 'and' || token === 'or') {
+                throw new Error('unexpected ' + token);
+            }
+            return markerSet(token);
+        }
+        var result = parseOr();
+        if (pos !== tokens.length) throw new Error('unexpected ' + tokens[pos]);
+        return result;
+    }
 
     var currentStatusFilter = 'all';
     function setFilterStatus(status) {
@@ -735,79 +2198,536 @@ HTML_TEMPLATE = """
     }
 
     function applyFilter() {
+        if (!REPORT) return;
         var searchTerm = document.getElementById('searchInput').value.toLowerCase();
-        var selectedMarker = document.getElementById('markerFilter').value;
         var status = currentStatusFilter;
+        var markerInput = document.getElementById('markerFilter');
+        var markerExpr = markerInput.value.trim();
+        var markerMask = null;
+        markerInput.classList.remove('is-invalid');
+        if (markerExpr && !PAGES) {
+            try {
+                markerMask = markerMatches(markerExpr);
+            } catch (e) {
+                // 表达式写到一半 (如 "smoke and") 时不过滤，只标红输入框
+                markerInput.classList.add('is-invalid');
+            }
+        }
+
+        if (PAGES) {
+            visibleFeatures = features.map(function(f) {
+                if (status !== 'all' && !f.stats[status]) return false;
+                return !searchTerm || f.name.toLowerCase().indexOf(searchTerm) !== -1;
+            });
+            layout(true);
+            return;
+        }
+        var matches = searchTerm ? searchMatches(searchTerm) : null;
+        visibleByFeature = featureScenarios.map(function(indices) {
+            return indices.filter(function(i) {
+                var row = scenarios[i];
+                if (status !== 'all' && row[F.status] !== status) return false;
+                if (markerMask && !((markerMask[i >> 5] >>> (i & 31)) & 1)) return false;
+                return !matches || matches[i] === 1;
+            });
+        });
+        layout(true);
+    }
+
+    function layout(remount) {
+        items = [];
+        visibleByFeature.forEach(function(indices, fi) {
+            if (PAGES) {
+                if (!visibleFeatures || visibleFeatures[fi]) items.push(['f', fi]);
+                return;
+            }
+            if (!indices.length) return;
+            items.push(['f', fi]);
+            if (collapsedFeatures[fi]) return;
+            indices.forEach(function(si) {
+                items.push(['s', si]);
+                if (expandedScenarios[si]) items.push(['d', si]);
+            });
+        });
+        computeOffsets();
+        if (remount) unmountAll();
+        document.getElementById('vt-empty').style.display = items.length ? 'none' : '';
+        render();
+    }
 
-        const featureRows = document.querySelectorAll('.feature-row');
-        const scenarioRows = document.querySelectorAll('.scenario-row');
+    function itemHeight(item) {
+        if (item[0] === 'f') return FEATURE_ROW_HEIGHT;
+        if (item[0] === 's') return SCENARIO_ROW_HEIGHT;
+        return detailHeights[item[1]] || DETAILS_ESTIMATED_HEIGHT;
+    }
 
-        scenarioRows.forEach(row => {
-            var sName = row.getAttribute('data-scenario-name');
-            var fName = row.getAttribute('data-feature-parent');
-            var sMarkers = row.getAttribute('data-markers') || "";
+    function computeOffsets() {
+        offsets = new Float64Array(items.length + 1);
+        for (var k = 0; k < items.length; k++) {
+            offsets[k + 1] = offsets[k] + itemHeight(items[k]);
+        }
+        spacer.style.height = offsets[items.length] + 'px';
+    }
 
-            var rowStatus = '';
-            if (row.classList.contains('status-passed')) rowStatus = 'passed';
-            else if (row.classList.contains('status-failed')) rowStatus = 'failed';
-            else if (row.classList.contains('status-error')) rowStatus = 'error';
-            else rowStatus = 'skipped';
+    // 二分查找包含纵坐标 y 的行
+    function findItem(y) {
+        var lo = 0, hi = items.length - 1;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (offsets[mid + 1] <= y) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
 
-            var statusMatch = (status === 'all') || (status === rowStatus);
-            if (status === 'failed') statusMatch = (rowStatus === 'failed'); 
-            else if (status === 'error') statusMatch = (rowStatus === 'error');
+    function unmountAll() {
+        for (var key in mounted) mounted[key].remove();
+        mounted = {};
+    }
 
-            var textMatch = (sName.includes(searchTerm) || fName.includes(searchTerm));
-            var markerMatch = (selectedMarker === 'all') || sMarkers.includes(selectedMarker);
+    function scheduleRender() {
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(function() {
+            renderPending = false;
+            render();
+        });
+    }
 
-            if (statusMatch && textMatch && markerMatch) {
-                row.style.display = '';
+    function render() {
+        var top = viewport.scrollTop;
+        var start = Math.max(0, findItem(top) - OVERSCAN);
+        var end = Math.min(items.length, findItem(top + viewport.clientHeight) + 1 + OVERSCAN);
+        var next = {};
+        var resized = false;
+
+        for (var k = start; k < end; k++) {
+            var item = items[k];
+            var key = item[0] + item[1];
+            var node = mounted[key];
+            if (node) {
+                delete mounted[key];
             } else {
-                row.style.display = 'none';
-                var nextRow = row.nextElementSibling;
-                if(nextRow && nextRow.classList.contains('details-row')) {
-                    nextRow.style.display = 'none'; 
-                }
+                node = createNode(item);
+                spacer.appendChild(node);
+            }
+            node.style.top = offsets[k] + 'px';
+            next[key] = node;
+            // 详情行高度不固定，挂载后测量真实高度
+            if (item[0] === 'd' && detailHeights[item[1]] !== node.offsetHeight) {
+                detailHeights[item[1]] = node.offsetHeight;
+                resized = true;
             }
+        }
+        unmountAll();
+        mounted = next;
+
+        if (resized) {
+            computeOffsets();
+            render();
+        }
+    }
+
+    function el(tag, className, text) {
+        var node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined && text !== null) node.textContent = text;
+        return node;
+    }
+
+    function createNode(item) {
+        if (item[0] === 'f') return createFeatureRow(item[1]);
+        if (item[0] === 's') return createScenarioRow(item[1]);
+        return createDetailsRow(item[1]);
+    }
+
+    function createFeatureRow(fi) {
+        var feature = features[fi];
+        var stats = feature.stats;
+        var row = el('div', 'vt-row feature-row status-' + feature.status);
+        row.style.height = FEATURE_ROW_HEIGHT + 'px';
+        row.onclick = function() {
+            if (PAGES) {
+                window.location.href = PAGES[fi];
+                return;
+            }
+            collapsedFeatures[fi] = !collapsedFeatures[fi];
+            layout(false);
+        };
+
+        var nameCell = el('div', 'vt-cell vt-name vt-ellipsis');
+        nameCell.appendChild(el('strong', null, feature.name));
+        row.appendChild(nameCell);
+
+        var statusCell = el('div', 'vt-cell vt-status');
+        if (feature.status === 'passed') {
+            statusCell.appendChild(el('span', 'badge bg-pass', 'ALL PASS'));
+        } else if (feature.status === 'skipped') {
+            statusCell.appendChild(el('span', 'badge bg-skip', 'SKIPPED'));
+        } else {
+            statusCell.appendChild(el('span', 'badge bg-danger',
+                'P:' + stats.passed + ' F:' + stats.failed + ' E:' + stats.error + ' S:' + stats.skipped));
+        }
+        row.appendChild(statusCell);
+        var durationCell = el('div', 'vt-cell vt-duration', feature.spark ? null : '-');
+        if (feature.spark) durationCell.innerHTML = feature.spark;
+        row.appendChild(durationCell);
+
+        var actionCell = el('div', 'vt-cell vt-action');
+        actionCell.appendChild(el('small', 'text-muted', PAGES ? 'Open' : 'Expand/Collapse'));
+        row.appendChild(actionCell);
+        return row;
+    }
+
+    var STATUS_CLASS = { passed: 'bg-pass', failed: 'bg-fail', error: 'bg-error' };
+
+    function createScenarioRow(si) {
+        var s = scenarios[si];
+        var status = s[F.status];
+        var row = el('div', 'vt-row scenario-row status-' + status);
+        row.style.height = SCENARIO_ROW_HEIGHT + 'px';
+
+        var nameCell = el('div', 'vt-cell vt-name vt-scenario-name');
+        var title = el('div', 'vt-ellipsis', s[F.name]);
+        title.title = s[F.name];
+        scenarioMarkers(s).forEach(function(m) {
+            title.appendChild(el('span', 'badge bg-secondary marker-badge', m));
         });
+        nameCell.appendChild(title);
+        nameCell.appendChild(el('div', 'text-muted small vt-ellipsis vt-nodeid', s[F.nodeid]));
+        row.appendChild(nameCell);
+
+        var statusCell = el('div', 'vt-cell vt-status');
+        statusCell.appendChild(el('span', 'status-badge ' + (STATUS_CLASS[status] || 'bg-skip'), status.toUpperCase()));
+        row.appendChild(statusCell);
+        row.appendChild(el('div', 'vt-cell vt-duration', s[F.duration] + 's'));
+
+        var actionCell = el('div', 'vt-cell vt-action');
+        var open = !!expandedScenarios[si];
+        var btn = el('button', 'btn btn-sm ' + (open ? 'btn-purple' : 'btn-outline-secondary'),
+            open ? 'Details Collapse' : 'Details Expand');
+        btn.style.fontSize = '0.8em';
+        btn.onclick = function() { toggleDetails(si); };
+        actionCell.appendChild(btn);
+        if (s[F.thumbnail]) {
+            var thumb = el('img', 'row-thumb');
+            thumb.loading = 'lazy';
+            thumb.alt = 'Failure Screenshot';
+            thumb.src = s[F.thumbnail];
+            thumb.onclick = function() { showImage(s[F.screenshot]); };
+            actionCell.appendChild(thumb);
+        }
+        row.appendChild(actionCell);
+        return row;
+    }
+
+    // 详情 (步骤、日志、截图) 只在展开时构建
+    function createDetailsRow(si) {
+        var s = scenarios[si];
+        var row = el('div', 'vt-row details-row');
+
+        // [setup, call, teardown] 秒，没有运行的阶段为 null
+        var phases = s[F.phases];
+        if (phases) {
+            var parts = [];
+            ['Setup', 'Call', 'Teardown'].forEach(function(label, k) {
+                if (phases[k] !== null) parts.push(label + ' ' + phases[k].toFixed(3) + 's');
+            });
+            if (s[F.worker]) parts.push(s[F.worker]);
+            row.appendChild(el('div', 'phase-line text-muted small', parts.join(' \u00b7 ')));
+        }
+
+        var steps = s[F.steps];
+        if (steps.length) {
+            var stepBox = el('div', 'step-container');
+            stepBox.style.display = 'block';
+            stepBox.appendChild(el('h6', 'border-bottom pb-2', 'Execution Steps'));
+            stepBox.appendChild(createStepTimeline(steps));
+            steps.forEach(function(step) {
+                var stepItem = el('div', 'step-item');
+                stepItem.appendChild(el('div', 'step-keyword', step[SF.keyword]));
+
+                var content = el('div', 'step-content');
+                content.appendChild(el('div', 'step-name', step[SF.name]));
+                var logs = step[SF.logs];
+                if (logs.length) {
+                    var stepLogs = el('div', 'step-logs');
+                    logs.forEach(function(line) { stepLogs.appendChild(el('span', 'log-line', line)); });
+                    content.appendChild(stepLogs);
+                }
+                stepItem.appendChild(content);
 
-        featureRows.forEach(fRow => {
-            var featureName = fRow.getAttribute('data-feature-name');
-            var visibleSiblings = document.querySelectorAll(`.scenario-row[data-feature-parent="${featureName}"]`);
-            var hasVisibleChildren = false;
-            visibleSiblings.forEach(s => {
-                if(s.style.display !== 'none') hasVisibleChildren = true;
+                var stepStatus = el('div', 'step-status');
+                if (step[SF.duration] !== null && step[SF.duration] !== undefined) {
+                    stepStatus.appendChild(el('span', 'step-duration', step[SF.duration].toFixed(3) + 's'));
+                }
+                if (step[SF.status] === 'passed') {
+                    stepStatus.appendChild(el('span', 'badge bg-pass', 'PASS'));
+                } else if (step[SF.status] === 'failed') {
+                    stepStatus.appendChild(el('span', 'badge bg-fail', 'FAIL'));
+                    stepStatus.appendChild(el('div', 'text-danger small mt-1', step[SF.error]));
+                }
+                stepItem.appendChild(stepStatus);
+                stepBox.appendChild(stepItem);
             });
+            row.appendChild(stepBox);
+        }
 
-            if (hasVisibleChildren) {
-                fRow.style.display = '';
+        var logBox = el('div', 'log-box');
+        logBox.style.display = 'block';
+        var trace = s[F.trace];
+        if (trace !== null && trace !== undefined) {
+            if (typeof trace === 'number') trace = REPORT.traces[trace];
+            logBox.appendChild(el('div', null, '=== Error Trace ===\\n' + trace + '\\n' + s[F.log]));
+        } else {
+            logBox.appendChild(el('div', null, s[F.log]));
+        }
+        if (s[F.status] === 'failed' || s[F.status] === 'error') {
+            var shotBox = el('div', 'screenshot-box');
+            shotBox.appendChild(el('h6', null, 'Failure Screenshot'));
+            if (s[F.screenshot]) {
+                var wrap = el('div');
+                var img = el('img', 'screenshot-img');
+                img.loading = 'lazy';
+                img.alt = 'Failure Screenshot';
+                // 有缩略图时先显示缩略图，原图只在灯箱打开时加载
+                img.onclick = function() { showImage(s[F.screenshot]); };
+                img.onload = scheduleRender;
+                img.src = s[F.thumbnail] || s[F.screenshot];
+                wrap.appendChild(img);
+                wrap.appendChild(el('div', 'small text-muted mt-1', 'Click image to enlarge'));
+                shotBox.appendChild(wrap);
             } else {
-                fRow.style.display = 'none';
+                var warning = el('div', 'alert alert-light border border-warning text-warning mt-2');
+                warning.appendChild(el('small', null, "No screenshot captured (Check 'driver' or 'page' fixture)."));
+                shotBox.appendChild(warning);
             }
-        });
+            logBox.appendChild(shotBox);
+        }
+        row.appendChild(logBox);
+        return row;
     }
 
-    function toggleDetails(idSuffix) {
-        var rowId = 'details-row-' + idSuffix;
-        var btnId = 'btn-details-' + idSuffix;
-        var row = document.getElementById(rowId);
-        var btn = document.getElementById(btnId);
+    // 场景内各步骤的时间轴: 位置 = 相对场景开始的偏移，宽度 = 步骤耗时
+    function createStepTimeline(steps) {
+        var span = 0;
+        steps.forEach(function(step) {
+            span = Math.max(span, (step[SF.start] || 0) + (step[SF.duration] || 0));
+        });
+        var bar = el('div', 'step-timeline');
+        if (!span) return bar;
+        steps.forEach(function(step) {
+            var seg = el('div', 'step-segment ' + (step[SF.status] === 'failed' ? 'bg-fail' : 'bg-pass'));
+            seg.style.left = (100 * (step[SF.start] || 0) / span) + '%';
+            seg.style.width = Math.max(0.3, 100 * (step[SF.duration] || 0) / span) + '%';
+            seg.title = step[SF.keyword] + ' ' + step[SF.name] + ' (' + (step[SF.duration] || 0).toFixed(3) + 's)';
+            bar.appendChild(seg);
+        });
+        return bar;
+    }
 
-        if (row.style.display === "none" || row.style.display === "") {
-            row.style.display = "table-row";
-            if (btn) {
-                btn.innerHTML = "Details Collapse";
-                btn.classList.remove('btn-outline-secondary');
-                btn.classList.add('btn-purple');
-            }
+    function toggleDetails(si) {
+        if (expandedScenarios[si]) {
+            delete expandedScenarios[si];
+            delete detailHeights[si];
         } else {
-            row.style.display = "none";
-            if (btn) {
-                btn.innerHTML = "Details Expand";
-                btn.classList.remove('btn-purple');
-                btn.classList.add('btn-outline-secondary');
+            expandedScenarios[si] = true;
+        }
+        // 重建场景行以更新按钮状态
+        var key = 's' + si;
+        if (mounted[key]) {
+            mounted[key].remove();
+            delete mounted[key];
+        }
+        layout(false);
+    }
+
+    // ===== Live mode: load the numbered chunks written by the running session =====
+    var featureIndexByName = {};
+    // 已加载的最后一个分片序号；分片写入后不再改变，每个只加载一次
+    var liveSeq = 0;
+    var liveDirty = false;
+
+    window.reportLive = {
+        push: function(row) {
+            ingestRow(row);
+            liveDirty = true;
+        }
+    };
+
+    function featureStatus(stats) {
+        if (stats.failed > 0) return 'failed';
+        if (stats.error > 0) return 'error';
+        if (stats.total > 0 && stats.skipped === stats.total) return 'skipped';
+        return 'passed';
+    }
+
+    function ingestRow(row) {
+        var name = row[F.feature];
+        var fi = featureIndexByName[name];
+        if (fi === undefined) {
+            fi = featureIndexByName[name] = features.length;
+            features.push({ name: name, status: 'passed', stats: { total: 0, passed: 0, failed: 0, error: 0, skipped: 0 } });
+            featureScenarios.push([]);
+        }
+        row[F.feature] = fi;
+        row[F.markers] = encodeMarkers(row[F.markers]);
+        markerSets = {};
+        featureScenarios[fi].push(scenarios.length);
+        searchKeys.push(undefined);
+        scenarios.push(row);
+
+        var stats = features[fi].stats;
+        stats.total++;
+        stats[row[F.status]]++;
+        features[fi].status = featureStatus(stats);
+    }
+
+    function updateSummary() {
+        var totals = { total: 0, passed: 0, failed: 0, error: 0, skipped: 0,
+                       feature_total: features.length, feature_passed: 0, feature_failed: 0, feature_error: 0, feature_skipped: 0 };
+        features.forEach(function(f) {
+            ['total', 'passed', 'failed', 'error', 'skipped'].forEach(function(k) { totals[k] += f.stats[k]; });
+            totals['feature_' + f.status]++;
+        });
+        for (var key in totals) document.getElementById('stat-' + key).textContent = totals[key];
+        updateDonut('chart-features', [totals.feature_passed, totals.feature_failed, totals.feature_error, totals.feature_skipped]);
+        updateDonut('chart-cases', [totals.passed, totals.failed, totals.error, totals.skipped]);
+    }
+
+    // 实时模式下按新的统计重新计算服务端生成的 SVG 环形图各段
+    function updateDonut(id, values) {
+        var chart = document.getElementById(id);
+        var total = values.reduce(function(a, b) { return a + b; }, 0);
+        var offset = 0;
+        chart.querySelectorAll('.donut-seg').forEach(function(seg, k) {
+            var circumference = parseFloat(seg.getAttribute('data-circumference'));
+            var length = total ? circumference * values[k] / total : 0;
+            seg.setAttribute('stroke-dasharray', length.toFixed(2) + ' ' + (circumference - length).toFixed(2));
+            seg.setAttribute('stroke-dashoffset', (-offset).toFixed(2));
+            offset += length;
+        });
+        var totalNode = chart.querySelector('.donut-total');
+        if (totalNode) totalNode.textContent = total;
+    }
+
+    function liveChunkSrc(seq) {
+        var name = String(seq);
+        while (name.length < 6) name = '0' + name;
+        return REPORT.live.src + '/' + name + '.js?t=' + Date.now();
+    }
+
+    function pollLive() {
+        var script = document.createElement('script');
+        script.src = liveChunkSrc(liveSeq + 1);
+        script.onload = function() {
+            // 分片已存在：立刻尝试下一个，追上进度后才重新渲染
+            script.remove();
+            liveSeq++;
+            pollLive();
+        };
+        script.onerror = function() {
+            // 下一个分片还没写出来：渲染已加载的结果，等待下一轮
+            script.remove();
+            if (liveDirty) {
+                liveDirty = false;
+                updateSummary();
+                applyFilter();
             }
+            document.getElementById('live-status').textContent =
+                'LIVE: ' + scenarios.length + ' results, updated ' + new Date().toLocaleTimeString();
+            setTimeout(pollLive, REPORT.live.interval);
+        };
+        document.body.appendChild(script);
+    }
+
+    viewport.addEventListener('scroll', scheduleRender);
+    window.addEventListener('resize', scheduleRender);
+    loadReportData().then(function(data) {
+        initData(data);
+        features.forEach(function(f, i) { featureIndexByName[f.name] = i; });
+        layout(true);
+        drawTimeline();
+        if (REPORT.live) pollLive();
+    });
+
+    // ===== Worker timeline (Gantt on a canvas, one lane per worker) =====
+    var TIMELINE_LANE = 22;
+    var TIMELINE_LABEL = 70;
+    var TIMELINE_COLORS = { passed: '#28a745', failed: '#dc3545', error: '#fd7e14', skipped: '#6c757d' };
+    var timelineByWorker = null;
+    var timelineScale = 1;
+    var timelineTimer = null;
+
+    function drawTimeline() {
+        var tl = REPORT.timeline;
+        var canvas = document.getElementById('timeline-canvas');
+        if (!tl || !canvas || !canvas.getContext) return;
+        if (!timelineByWorker) {
+            // 每个 Worker 的条目已按开始时间排序，鼠标悬停时二分查找
+            timelineByWorker = tl.workers.map(function() { return []; });
+            tl.entries.forEach(function(e) { timelineByWorker[e[0]].push(e); });
+        }
+        var width = canvas.parentNode.clientWidth || 800;
+        var height = tl.workers.length * TIMELINE_LANE + 18;
+        var ratio = window.devicePixelRatio || 1;
+        canvas.width = width * ratio;
+        canvas.height = height * ratio;
+        canvas.style.height = height + 'px';
+        var ctx = canvas.getContext('2d');
+        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+        ctx.clearRect(0, 0, width, height);
+        timelineScale = (width - TIMELINE_LABEL - 10) / (tl.span || 1);
+
+        ctx.font = '11px sans-serif';
+        tl.workers.forEach(function(name, i) {
+            ctx.fillStyle = i % 2 ? '#f8f9fa' : '#fff';
+            ctx.fillRect(0, i * TIMELINE_LANE, width, TIMELINE_LANE);
+            ctx.fillStyle = '#495057';
+            ctx.fillText(name, 4, i * TIMELINE_LANE + 15);
+        });
+        tl.entries.forEach(function(e) {
+            var x = TIMELINE_LABEL + e[1] * timelineScale;
+            var y = e[0] * TIMELINE_LANE + 3;
+            [[e[2], '#ced4da'], [e[3], TIMELINE_COLORS[e[5]] || '#6c757d'], [e[4], '#868e96']].forEach(function(part) {
+                var w = part[0] * timelineScale;
+                if (w <= 0) return;
+                ctx.fillStyle = part[1];
+                ctx.fillRect(x, y, Math.max(w, 0.5), TIMELINE_LANE - 6);
+                x += w;
+            });
+        });
+        ctx.fillStyle = '#6c757d';
+        var axisY = tl.workers.length * TIMELINE_LANE + 13;
+        for (var k = 0; k <= 5; k++) {
+            var t = tl.span * k / 5;
+            ctx.fillText(t.toFixed(t < 10 ? 1 : 0) + 's', TIMELINE_LABEL + t * timelineScale - (k === 5 ? 30 : 0), axisY);
+        }
+    }
+
+    function timelineEntryAt(offsetX, offsetY) {
+        var lane = timelineByWorker && timelineByWorker[Math.floor(offsetY / TIMELINE_LANE)];
+        if (!lane) return null;
+        var t = (offsetX - TIMELINE_LABEL) / timelineScale;
+        var lo = 0, hi = lane.length - 1;
+        while (lo < hi) {
+            var mid = (lo + hi + 1) >> 1;
+            if (lane[mid][1] <= t) lo = mid; else hi = mid - 1;
         }
+        var e = lane[lo];
+        return e && t >= e[1] && t <= e[1] + e[2] + e[3] + e[4] ? e : null;
+    }
+
+    var timelineCanvas = document.getElementById('timeline-canvas');
+    if (timelineCanvas) {
+        timelineCanvas.addEventListener('mousemove', function(ev) {
+            var e = timelineEntryAt(ev.offsetX, ev.offsetY);
+            timelineCanvas.title = e ? e[6] + '\\nsetup ' + e[2].toFixed(2) + 's / call ' + e[3].toFixed(2) +
+                's / teardown ' + e[4].toFixed(2) + 's (' + e[5] + ')' : '';
+        });
+        window.addEventListener('resize', function() {
+            clearTimeout(timelineTimer);
+            timelineTimer = setTimeout(drawTimeline, 200);
+        });
     }
 
     function showImage(src) {
@@ -827,40 +2747,444 @@ HTML_TEMPLATE = """
 """
 
 
-def generate_html_report(report_data_obj):
-    env_info = {
-        "python_version": sys.version.split()[0],
-        "platform": platform.platform(),
-        "start_time": datetime.fromtimestamp(report_data_obj.start_time).strftime('%Y-%m-%d %H:%M:%S'),
-        "duration": report_data_obj.duration
-    }
+# 数据岛里每个 scenario / step 都是一个数组，JS 端按 fields 列表取下标
+SCENARIO_FIELDS = ("feature", "name", "nodeid", "status", "duration", "markers", "log", "steps", "screenshot",
+                   "thumbnail", "trace", "phases", "worker")
+STEP_FIELDS = ("keyword", "name", "status", "error", "logs", "start", "duration")
 
-    def hash_filter(value):
-        return abs(hash(value))
 
-    def get_sort_key(text):
-        match = re.match(r"(\d+(\.\d+)*)", text.strip())
-        if match:
-            return [int(x) for x in match.group(0).split('.') if x]
-        return [0]
+def _json_for_html(value):
+    # 数据岛嵌在 <script> 里：转义 <、>、& 以免提前闭合标签
+    text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return text.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
 
-    features_list = sorted(
-        report_data_obj.features.items(),
-        key=lambda item: get_sort_key(item[0])
-    )
 
-    for _, feature_data in features_list:
-        feature_data['scenarios'].sort(
-            key=lambda s: get_sort_key(s['name'])
-        )
+def _format_step_logs(step, entries=None):
+    # 日志在采集时只存 [created, levelname, message]，这里才格式化成文本行
+    if entries is None:
+        entries = step.get("logs", ())
+    lines = []
+    elided = step.get("logs_elided", 0)
+    if elided:
+        lines.append(f"... {elided} lines elided ...")
+    for entry in entries:
+        if isinstance(entry, str):
+            lines.append(entry)
+        else:
+            created, level, message = entry
+            lines.append(f"{time.strftime('%H:%M:%S', time.localtime(created))} - {level} - {message}")
+    return lines
+
+
+def _marker_words(markers, marker_bits):
+    # marker 位图: 第 n 个 marker 在第 n // 32 个字的第 n % 32 位
+    words = [0] * max(1, (len(marker_bits) + 31) // 32)
+    for m in markers:
+        bit = marker_bits[m]
+        words[bit >> 5] |= 1 << (bit & 31)
+    return words
+
+
+def _screenshot_urls(url, thumb):
+    """
+    Return the ``(url, thumbnail_url)`` actually stored: when background transcoding failed only
+    the original ``<digest>.png`` was written, without a thumbnail.
+    """
+    if not thumb:
+        return url, thumb
+    report_dir = os.path.dirname(os.path.abspath(report_options["report_path"]))
+    if os.path.exists(os.path.join(report_dir, thumb)):
+        return url, thumb
+    png_url = f"{url.rsplit('/', 1)[0]}/{_png_name(url)}" if "/" in url else _png_name(url)
+    if os.path.exists(os.path.join(report_dir, png_url)):
+        return png_url, None
+    return url, thumb
+
+
+def _scenario_row(feature_index, scenario, traces=None, marker_bits=None):
+    # trace 是数据岛 traces 表的下标；传入 traces 时 (实时模式) 直接内联文本
+    # 传入 marker_bits 时 markers 编码为位图，否则 (实时模式) 保留名字
+    screenshot, thumbnail = _screenshot_urls(scenario.get("screenshot_url"), scenario.get("screenshot_thumb"))
+    if not screenshot and scenario.get("screenshot"):
+        screenshot = f"data:image/png;base64,{scenario['screenshot']}"
+    if not screenshot and scenario.get("screenshot_spool"):
+        img_bytes = _spool_read(scenario["screenshot_spool"])
+        if img_bytes:
+            screenshot = f"data:image/png;base64,{base64.b64encode(img_bytes).decode('utf-8')}"
+    trace = scenario.get("trace")
+    phases = scenario.get("phases")
+    spooled_logs = None
+    if scenario.get("logs_spool"):
+        payload = _spool_read(scenario["logs_spool"])
+        spooled_logs = json.loads(payload) if payload else None
+    steps = [[step.get("keyword"), step.get("name"), step.get("status"), step.get("error", ""),
+              _format_step_logs(step, spooled_logs[i] if spooled_logs else None),
+              step.get("start"), step.get("duration")]
+             for i, step in enumerate(scenario["steps"])]
+    return [feature_index, scenario["name"], scenario["nodeid"], scenario["status"], scenario["duration"],
+            _marker_words(scenario["markers"], marker_bits) if marker_bits is not None else scenario["markers"],
+            scenario["log"], steps, screenshot, thumbnail,
+            trace if traces is None or trace is None else traces[trace],
+            [phases.get(phase) for phase in TIMELINE_PHASES] if phases else None, scenario.get("worker")]
+
+
+def _iter_report_data(features_list, live=None, traces=(), pages=None, markers=(), sparklines=None, timeline=None,
+                      rendered=None):
+    """
+    Yield the report's JSON data island piece by piece, one scenario row per chunk.
+    With ``pages`` (the index of a multi-page report) only the feature list and page URLs are included;
+    ``rendered`` is an already encoded ``(fragment, row_tokens)`` for the scenario rows.
+    """
+    feature_meta = [{"name": name, "status": feature["status"], "stats": feature["stats"],
+                     "spark": (sparklines or {}).get(name, "")}
+                    for name, feature in features_list]
+    live_meta = {"src": live.src, "interval": int(live.interval * 1000)} if live else None
+    yield (f'{{"fields":{_json_for_html(SCENARIO_FIELDS)},"stepFields":{_json_for_html(STEP_FIELDS)},'
+           f'"live":{_json_for_html(live_meta)},"features":{_json_for_html(feature_meta)},"traces":[')
+    # traces 可能是 SQLite 里的整张表，逐条输出
+    separator = ""
+    for text in traces:
+        yield separator + _json_for_html(text)
+        separator = ","
+    yield (f'],"markers":{_json_for_html(list(markers))},'
+           f'"timeline":{_json_for_html(timeline)},"scenarios":[')
+    if pages is not None:
+        yield f'],"pages":{_json_for_html(pages)}}}'
+        return
+    search_index = _SearchIndex(traces)
+    marker_bits = {m: bit for bit, m in enumerate(markers)}
+    jobs = report_options["render_jobs"] or os.cpu_count() or 1
+    separator = ""
+    if rendered is not None:
+        fragment, row_tokens = rendered
+        for tokens, trace in row_tokens:
+            search_index.add(tokens, trace)
+        yield fragment
+    elif jobs > 1 and len(features_list) > 1:
+        for fragment, row_tokens, _ in _iter_parallel_fragments(features_list, jobs, marker_bits):
+            for tokens, trace in row_tokens:
+                search_index.add(tokens, trace)
+            if fragment:
+                yield separator + fragment
+                separator = ","
+    else:
+        for feature_index, (_, feature) in enumerate(features_list):
+            for scenario in feature["scenarios"]:
+                row = _scenario_row(feature_index, scenario, marker_bits=marker_bits)
+                search_index.add(*_row_tokens(row))
+                yield separator + _json_for_html(row)
+                separator = ","
+    yield '],"search":'
+    yield from search_index.iter_json()
+    yield "}"
+
+
+# === 搜索索引：生成报告时建好 token -> 场景下标的倒排表，页面上按前缀查表 ===
+# 分词规则必须与页面 JS 中的 SEARCH_TOKEN 一致
+_SEARCH_TOKEN = re.compile(r"[a-z0-9_]+|[^\x00-\x7f\s]")
+_LOG_TIME_PREFIX = re.compile(r"^\d\d:\d\d:\d\d - ")
+_ROW = {name: i for i, name in enumerate(SCENARIO_FIELDS)}
+_STEP = {name: i for i, name in enumerate(STEP_FIELDS)}
+
+
+def _tokenize(texts):
+    tokens = set()
+    for text in texts:
+        if text:
+            tokens.update(token[:40] for token in _SEARCH_TOKEN.findall(text.lower()))
+    return tokens
+
+
+def _row_tokens(row):
+    """Return ``(tokens, trace)`` for a scenario row: name, log, step names, errors and step logs."""
+    texts = [row[_ROW["name"]], row[_ROW["log"]]]
+    for step in row[_ROW["steps"]]:
+        texts.append(step[_STEP["name"]])
+        texts.append(step[_STEP["error"]])
+        texts.extend(_LOG_TIME_PREFIX.sub("", line) for line in step[_STEP["logs"]])
+    return _tokenize(texts), row[_ROW["trace"]]
+
+
+class _SearchIndex:
+    # 倒排表用 array('I') 存场景下标，输出时做差分编码
+
+    def __init__(self, traces=()):
+        self.traces = traces
+        self.count = 0
+        self.postings = {}
+        self._trace_tokens = {}
+
+    def add(self, tokens, trace=None):
+        if trace is not None:
+            if isinstance(trace, str):
+                tokens = tokens | _tokenize([trace])
+            else:
+                # 同一个 trace 被很多场景引用，只分词一次
+                if trace not in self._trace_tokens:
+                    self._trace_tokens[trace] = _tokenize([self.traces[trace]])
+                tokens = tokens | self._trace_tokens[trace]
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = array.array("I")
+            posting.append(self.count)
+        self.count += 1
+
+    def iter_json(self):
+        """Yield ``{"count", "tokens", "postings"}`` as JSON; postings are delta-encoded."""
+        tokens = sorted(self.postings)
+        yield f'{{"count":{self.count},"tokens":{_json_for_html(tokens)},"postings":['
+        separator = ""
+        for token in tokens:
+            previous = 0
+            deltas = []
+            for i in self.postings[token]:
+                deltas.append(i - previous)
+                previous = i
+            yield separator + _json_for_html(deltas)
+            separator = ","
+        yield "]}"
+
+
+# === 并行渲染 (--report-jobs)：每个 Feature 的数据岛片段在子进程中编码，按顺序拼接 ===
+def _init_render_worker(options):
+    report_options.update(options)
+
+
+def _localize_traces(rows):
+    """Renumber the trace ids of ``rows`` in place to a table of their own; returns the original ids in that order."""
+    local = {}
+    field = _ROW["trace"]
+    for row in rows:
+        if row[field] is not None:
+            row[field] = local.setdefault(row[field], len(local))
+    return list(local)
+
+
+def _render_feature_fragment(feature_index, scenarios, db_path, feature_name, marker_bits, local_traces=False):
+    # SQLite 模式下子进程自己只读打开数据库，不经过进程间传输
+    if scenarios is None:
+        store = SqliteResultStore.open_reader(db_path)
+        try:
+            scenarios = list(store.iter_scenarios(feature_name))
+        finally:
+            store.conn.close()
+    rows = [_scenario_row(feature_index, scenario, marker_bits=marker_bits) for scenario in scenarios]
+    # 分页报告的 Feature 页只带本页引用到的 trace
+    trace_ids = _localize_traces(rows) if local_traces else None
+    # 分词也在子进程里做，Master 只合并倒排表
+    return ",".join(_json_for_html(row) for row in rows), [_row_tokens(row) for row in rows], trace_ids
+
 
-    env = Environment()
-    env.filters['hash'] = hash_filter
-    template = env.from_string(HTML_TEMPLATE)
+def _iter_parallel_fragments(features_list, jobs, marker_bits, pages=False):
+    """
+    Yield ``(fragment, row_tokens, trace_ids)`` for each feature: its scenario rows as one JSON fragment, in
+    feature order. With ``pages`` each feature is rendered for a page of its own (feature index 0, page-local
+    trace ids; ``trace_ids`` lists the original ids).
+    """
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_render_worker,
+                             initargs=(dict(report_options),)) as executor:
+        pending = collections.deque()
+        for feature_index, (feature_name, feature) in enumerate(features_list):
+            scenarios = feature["scenarios"]
+            if pages:
+                feature_index = 0
+            if isinstance(scenarios, _StoredScenarios):
+                args = (feature_index, None, scenarios.store.path, feature_name, marker_bits, pages)
+            else:
+                args = (feature_index, scenarios, None, feature_name, marker_bits, pages)
+            pending.append(executor.submit(_render_feature_fragment, *args))
+            # 只让有限个片段排队，流式写出时内存不随 Feature 数增长
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# 状态配色，与图表 / 徽章一致
+STATUS_COLORS = {"passed": "#28a745", "failed": "#dc3545", "error": "#fd7e14", "skipped": "#6c757d"}
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "report_vendor")
+
+
+def _minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def _minify_js(js):
+    # 只做保守的空白压缩：去缩进、空行和整行注释，不改动语句本身
+    lines = (line.strip() for line in js.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+@functools.lru_cache(maxsize=None)
+def _offline_template_source(source):
+    """Minify the template's inline <style>/<script> blocks for the offline bundle."""
+    source = re.sub(r"(<style>)(.*?)(</style>)",
+                    lambda m: m.group(1) + _minify_css(m.group(2)) + m.group(3), source, flags=re.S)
+    return re.sub(r"(<script>)(.*?)(</script>)",
+                  lambda m: m.group(1) + _minify_js(m.group(2)) + m.group(3), source, flags=re.S)
+
+
+@functools.lru_cache(maxsize=None)
+def _vendor_css():
+    with open(os.path.join(VENDOR_DIR, "bootstrap-subset.css"), encoding="utf-8") as f:
+        return _minify_css(f.read())
+
+
+def _svg_donut(segments, size=240, thickness=42):
+    """Render ``[(label, value, color)]`` as an inline SVG donut chart with an HTML legend."""
+    center = size / 2
+    radius = (size - thickness) / 2
+    circumference = 2 * math.pi * radius
+    total = sum(value for _, value, _ in segments)
+    parts = [f'<svg viewBox="0 0 {size} {size}" width="{size}" height="{size}" role="img">',
+             f'<circle cx="{center}" cy="{center}" r="{radius}" fill="none" stroke="#e9ecef" '
+             f'stroke-width="{thickness}"/>']
+    offset = 0.0
+    for label, value, color in segments:
+        # 值为 0 的段也输出 (长度 0)，实时模式由 JS 更新各段长度
+        length = circumference * value / total if total else 0.0
+        parts.append(
+            f'<circle class="donut-seg" cx="{center}" cy="{center}" r="{radius}" fill="none" stroke="{color}" '
+            f'stroke-width="{thickness}" stroke-dasharray="{length:.2f} {circumference - length:.2f}" '
+            f'stroke-dashoffset="{-offset:.2f}" transform="rotate(-90 {center} {center})" '
+            f'data-circumference="{circumference:.2f}"><title>{label}: {value}</title></circle>')
+        offset += length
+    parts.append(f'<text class="donut-total" x="{center}" y="{center}" text-anchor="middle" '
+                 f'dominant-baseline="central" font-size="28" font-weight="bold" fill="#343a40">{total}</text></svg>')
+    parts.append('<div class="svg-legend">')
+    parts.extend(f'<span><i style="background:{color}"></i>{label}</span>' for label, _, color in segments)
+    parts.append('</div>')
+    return "".join(parts)
+
+
+def _svg_sparkline(durations, width=110, height=22, max_points=40):
+    """Render scenario durations (in report order) as a small inline SVG line chart."""
+    if not durations:
+        return ""
+    total = sum(durations)
+    points = list(durations)
+    if len(points) > max_points:
+        # 点太多时分桶取最大值，慢场景不会被平均掉
+        size = len(points) / max_points
+        points = [max(points[int(i * size):max(int((i + 1) * size), int(i * size) + 1)]) for i in range(max_points)]
+    peak = max(points) or 1
+    step = width / max(len(points) - 1, 1)
+    coords = " ".join(f"{i * step:.1f},{height - 2 - (height - 4) * value / peak:.1f}" for i, value in enumerate(points))
+    return (f'<svg class="sparkline" viewBox="0 0 {width} {height}" width="{width}" height="{height}">'
+            f'<title>{len(durations)} scenarios, total {total:.2f}s, max {max(durations):.2f}s</title>'
+            f'<polyline points="{coords}" fill="none" stroke="#0d6efd" stroke-width="1.5"/></svg>')
+
+
+# 已编译模板，key 为模板源码的 SHA-256
+_compiled_templates = {}
+
+
+def _get_template(source):
+    """Return the compiled template for ``source``, compiling it at most once per process."""
+    key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    template = _compiled_templates.get(key)
+    if template is None:
+        # from_string 不走 bytecode cache，需通过 loader 加载；源码变了 key 随之变化
+        env = Environment(loader=DictLoader({key: source}),
+                          bytecode_cache=FileSystemBytecodeCache(report_options["template_cache_dir"]))
+        template = env.get_template(key)
+        _compiled_templates[key] = template
+    return template
+
+
+def _iter_gzip_base64(chunks, level=9):
+    """Gzip a stream of text chunks and yield it back as base64 text, still chunk by chunk."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    pending = b""
+    for chunk in chunks:
+        pending += compressor.compress(chunk.encode("utf-8"))
+        # base64 按 3 字节对齐编码，余下的留到下一轮
+        cut = len(pending) - len(pending) % 3
+        if cut:
+            yield base64.b64encode(pending[:cut]).decode("ascii")
+            pending = pending[cut:]
+    yield base64.b64encode(pending + compressor.flush()).decode("ascii")
+
+
+# Streaming mode flushes the rendered output every N template events
+REPORT_STREAM_BUFFER = 64
+
+
+def _write_page(template, context, report_data, output_path):
+    if context["compress"]:
+        report_data = _iter_gzip_base64(report_data)
+    context = dict(context, report_data=report_data)
+
+    if report_options["stream"]:
+        # 边渲染边写入，峰值内存不随报告大小增长
+        stream = template.stream(**context)
+        stream.enable_buffering(REPORT_STREAM_BUFFER)
+        stream.dump(output_path, encoding="utf-8")
+    else:
+        html_content = template.render(**context)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(html_content)
+
+    if context["compress"]:
+        # 供 CI 归档使用的 gzip 副本
+        with open(output_path, "rb") as src, gzip.open(f"{output_path}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+
+
+def generate_html_report(report_data_obj, output_path=None, live=None):
+    output_path = output_path or report_options["report_path"]
+    env_info = {
+        "python_version": sys.version.split()[0],
+        "platform": platform.platform(),
+        "start_time": datetime.fromtimestamp(report_data_obj.start_time).strftime('%Y-%m-%d %H:%M:%S'),
+        "duration": report_data_obj.duration,
+        "plugin_cache": report_data_obj.plugin_cache_summary()
+    }
 
-    html_content = template.render(
-        features=features_list,
+    features_list = report_data_obj.sorted_features()
+
+    offline = report_options["offline"]
+    template = _get_template(_offline_template_source(HTML_TEMPLATE) if offline else HTML_TEMPLATE)
+    # 图表在服务端生成为内联 SVG，页面不需要图表运行库
+    charts = {
+        "features": _svg_donut([
+            ("Passed", report_data_obj.feature_passed, STATUS_COLORS["passed"]),
+            ("Failed", report_data_obj.feature_failed, STATUS_COLORS["failed"]),
+            ("Error", report_data_obj.feature_error, STATUS_COLORS["error"]),
+            ("Skipped", report_data_obj.feature_skipped, STATUS_COLORS["skipped"])]),
+        "cases": _svg_donut([
+            ("Passed", report_data_obj.passed, STATUS_COLORS["passed"]),
+            ("Failed", report_data_obj.failed, STATUS_COLORS["failed"]),
+            ("Error", report_data_obj.error, STATUS_COLORS["error"]),
+            ("Skipped", report_data_obj.skipped, STATUS_COLORS["skipped"])]),
+    }
+    sparklines = {name: _svg_sparkline(report_data_obj.feature_durations(name)) for name, _ in features_list}
+    timeline, timeline_workers = report_data_obj.timeline_data()
+    phase_costs, fixture_costs = report_data_obj.phase_costs()
+    duration_overall, duration_features, duration_markers = report_data_obj.duration_percentiles()
+
+    compress = report_options["compress"]
+    context = dict(
+        compress=compress,
         all_markers=sorted(list(report_data_obj.all_markers)),
+        regressions=report_data_obj.regressions,
+        slowest_steps=report_data_obj.slowest_steps(),
+        failure_clusters=report_data_obj.sorted_clusters(),
+        timeline_workers=timeline_workers,
+        phase_costs=phase_costs if report_data_obj.timeline else [],
+        fixture_costs=fixture_costs[:30],
+        slowest_scenarios=report_data_obj.slowest_scenarios(),
+        duration_overall=duration_overall,
+        duration_features=duration_features,
+        duration_markers=duration_markers,
+        regression_window=DurationHistory.WINDOW,
+        offline=offline,
+        vendor_css=_vendor_css() if offline else "",
+        charts=charts,
         stats={
             "total": report_data_obj.total,
             "passed": report_data_obj.passed,
@@ -873,10 +3197,42 @@ def generate_html_report(report_data_obj):
             "feature_error": report_data_obj.feature_error,
             "feature_skipped": report_data_obj.feature_skipped
         },
-        env=env_info
+        env=env_info,
+        page=None
     )
 
-    with open("report.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
-
-    print(f"\nReport Generated: {os.path.abspath('report.html')}")
\ No newline at end of file
+    split_threshold = report_options["split_threshold"]
+    if live is None and split_threshold and report_data_obj.total > split_threshold:
+        # 分页报告：report.html 作为首页 (汇总 + Feature 列表)，每个 Feature 单独一页
+        pages_dir = os.path.splitext(output_path)[0] + "-pages"
+        shutil.rmtree(pages_dir, ignore_errors=True)
+        os.makedirs(pages_dir)
+        pages = []
+        # 每页的场景行可由 --report-jobs 的进程池编码；trace 只带本页引用到的，重新编号
+        marker_bits = {m: bit for bit, m in enumerate(context["all_markers"])}
+        jobs = report_options["render_jobs"] or os.cpu_count() or 1
+        if jobs > 1 and len(features_list) > 1:
+            fragments = _iter_parallel_fragments(features_list, jobs, marker_bits, pages=True)
+        else:
+            fragments = (_render_feature_fragment(0, feature["scenarios"], None, name, marker_bits, local_traces=True)
+                         for name, feature in features_list)
+        for feature_index, (feature, (fragment, row_tokens, trace_ids)) in enumerate(zip(features_list, fragments)):
+            page_name = f"feature-{feature_index + 1:04d}.html"
+            pages.append(f"{os.path.basename(pages_dir)}/{page_name}")
+            page_context = dict(context, regressions=[], slowest_steps=[], failure_clusters=[], timeline_workers=[],
+                                phase_costs=[], fixture_costs=[], duration_overall=None,
+                                page={"kind": "feature", "name": feature[0],
+                                      "index_url": os.path.basename(output_path)})
+            page_traces = [report_data_obj.traces[trace] for trace in trace_ids]
+            page_data = _iter_report_data([feature], traces=page_traces, markers=context["all_markers"],
+                                          sparklines=sparklines, rendered=(fragment, row_tokens))
+            _write_page(template, page_context, page_data, os.path.join(pages_dir, page_name))
+        report_data = _iter_report_data(features_list, pages=pages, sparklines=sparklines, timeline=timeline)
+        context["page"] = {"kind": "index"}
+    else:
+        report_data = _iter_report_data(features_list, live=live, traces=report_data_obj.traces,
+                                        markers=context["all_markers"], sparklines=sparklines, timeline=timeline)
+
+    _write_page(template, context, report_data, output_path)
+
+    print(f"\nReport Generated: {os.path.abspath(output_path)}")
\ No newline at end of file
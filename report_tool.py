@@ -0,0 +1,324 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+"""
+报告工具 (Report tool)
+
+Works on the JSON Lines dumps written with ``pytest --report-dump PATH``.
+
+    python report_tool.py merge shard-*/report.jsonl -o merged/report.html
+    python report_tool.py diff yesterday.jsonl today.jsonl --threshold 2
+
+``merge`` streams the dumps line by line into a SQLite result store and renders
+one report from it, so memory does not grow with the number of scenarios or
+screenshots. Screenshot assets and spooled data referenced by a dump are looked
+up in the directory of the report the dump was written with (recorded relative
+to the dump file) and copied next to the merged report. Worker timelines keep
+one lane per shard and worker (``shard2:gw0``).
+
+``diff`` compares two runs (dumps or ``--report-db`` databases) by nodeid and
+writes a page with the status transitions, new and removed scenarios, and the
+duration changes above the threshold.
+"""
+import argparse
+import json
+import os
+import posixpath
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import conftest  # noqa: E402
+
+
+def _iter_dump(path):
+    # 逐行读取，第一行必须是 session 头
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            record = json.loads(line)
+            if line_no == 1 and (record.get("type") != "session" or record.get("version") != conftest.DUMP_VERSION):
+                raise SystemExit(f"{path}: not a report dump (version {conftest.DUMP_VERSION})")
+            yield record
+
+
+def _copy_file(src_dir, name, dst_dir):
+    # 资源文件按内容寻址命名，目标已存在就不用再复制
+    src = os.path.join(src_dir, name)
+    dst = os.path.join(dst_dir, name)
+    if os.path.exists(dst):
+        return
+    if not os.path.exists(src):
+        print(f"Warning: {src} referenced by the dump does not exist")
+        return
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    shutil.copyfile(src, dst)
+
+
+def _copy_screenshot(base_dir, scenario_result, out_dir):
+    url, thumb = scenario_result.get("screenshot_url"), scenario_result.get("screenshot_thumb")
+    if thumb and not os.path.exists(os.path.join(base_dir, thumb)):
+        # 后台转码失败时只写了原始的 <digest>.png，没有缩略图
+        png_url = posixpath.join(posixpath.dirname(url), conftest._png_name(url))
+        if os.path.exists(os.path.join(base_dir, png_url)):
+            url, thumb = png_url, None
+            scenario_result.update(screenshot_url=url, screenshot_thumb=None)
+    for name in (url, thumb):
+        if name:
+            _copy_file(base_dir, name, out_dir)
+
+
+def merge_dump(report, path, out_dir, shard=None):
+    """
+    Add every scenario of the dump at ``path`` to ``report``; returns the dump's session header.
+    ``shard`` prefixes the worker names of the dump's timeline.
+    """
+    src_dir = os.path.dirname(os.path.abspath(path))
+    header = base_dir = None
+    trace_ids = {}
+    for record in _iter_dump(path):
+        kind = record["type"]
+        if kind == "session":
+            header = record
+            base_dir = os.path.normpath(os.path.join(src_dir, header.get("report_dir", ".")))
+        elif kind == "trace":
+            # trace 下标只在单个 dump 内有效，合并时重新编号
+            text = record["text"]
+            trace_ids[record["id"]] = report._trace_id(text, conftest._trace_signature(text))
+        elif kind == "phase":
+            entry = record["entry"]
+            if shard:
+                entry[0] = f"{shard}:{entry[0]}"
+            report.timeline[record["nodeid"]] = entry
+        elif kind == "fixture":
+            scope, count, total, longest = record["stats"]
+            entry = report.fixture_stats.setdefault(record["name"], [scope, 0, 0.0, 0.0])
+            entry[1] += count
+            entry[2] += total
+            entry[3] = max(entry[3], longest)
+        elif kind == "scenario":
+            scenario_result = record["scenario"]
+            if scenario_result.get("trace") is not None:
+                scenario_result["trace"] = trace_ids[scenario_result["trace"]]
+            if shard and scenario_result.get("worker"):
+                scenario_result["worker"] = f"{shard}:{scenario_result['worker']}"
+            _copy_screenshot(base_dir, scenario_result, out_dir)
+            for key in ("screenshot_spool", "logs_spool"):
+                if scenario_result.get(key):
+                    _copy_file(os.path.join(base_dir, header["spool_dir"]), scenario_result[key],
+                               os.path.join(out_dir, conftest.report_options["spool_dir"]))
+            report.add_scenario(record["feature"], scenario_result)
+    return header
+
+
+def cmd_merge(args):
+    output = os.path.abspath(args.output)
+    out_dir = os.path.dirname(output)
+    os.makedirs(out_dir, exist_ok=True)
+    conftest.report_options.update(report_path=output, stream=True, offline=args.offline,
+                                   compress=args.compress, split_threshold=args.split_threshold)
+
+    # 合并结果写入 SQLite，内存不随场景数增长；未指定 --db 时用临时库
+    db_path = args.db or os.path.splitext(output)[0] + ".merge.sqlite"
+    report = conftest.TestSessionReport(db_path=db_path)
+    # 各分片的 Worker 名字 (gw0 ...) 会重复，时间轴上按分片区分
+    sessions = [merge_dump(report, path, out_dir, shard=f"shard{n}" if len(args.dumps) > 1 else None)
+                for n, path in enumerate(args.dumps, 1)]
+    report.finalize()
+
+    # 会话时间取所有分片的最早开始到最晚结束
+    report.start_time = min(h["start_time"] for h in sessions)
+    report.duration = round(max(h["start_time"] + h["duration"] for h in sessions) - report.start_time, 2)
+
+    conftest.generate_html_report(report, output_path=output)
+    report.store.close()
+    if not args.db:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    print(f"Merged {len(args.dumps)} dumps: {report.total} scenarios in {report.feature_total} features")
+
+
+def _iter_results(path):
+    """Yield ``(nodeid, feature, name, status, duration)`` from a dump or a ``--report-db`` database."""
+    with open(path, "rb") as f:
+        is_sqlite = f.read(16) == b"SQLite format 3\x00"
+    if is_sqlite:
+        store = conftest.SqliteResultStore.open_reader(path)
+        try:
+            yield from store.conn.execute("SELECT nodeid, feature, name, status, duration FROM scenarios")
+        finally:
+            store.close()
+        return
+    for record in _iter_dump(path):
+        if record["type"] == "scenario":
+            s = record["scenario"]
+            yield s["nodeid"], record["feature"], s["name"], s["status"], s["duration"]
+
+
+FAILING = ("failed", "error")
+
+
+def _collapse_results(path):
+    """
+    Return ``{nodeid: (feature, name, status, duration)}`` with one entry per test.
+    A call failure followed by a teardown error gives two rows for the same nodeid: keep the most severe
+    status (as ``DurationHistory.record_run`` does) and the duration of the call-phase row.
+    """
+    severity = conftest.DurationHistory.STATUS_SEVERITY
+    results = {}
+    for nodeid, feature, name, status, duration in _iter_results(path):
+        previous = results.get(nodeid)
+        if previous is not None:
+            if severity.get(previous[2], 0) > severity.get(status, 0):
+                status = previous[2]
+            # "error" 只来自 setup / teardown，其余状态的那条才是 call 阶段的结果
+            if previous[2] != "error":
+                duration = previous[3]
+        results[nodeid] = (feature, name, status, duration)
+    return results
+
+
+def diff_results(base_path, head_path, threshold):
+    """
+    Join the two runs on nodeid (each collapsed to one row per test) and return the differences
+    grouped by kind.
+    """
+    base = _collapse_results(base_path)
+    diff = {"regressed": [], "fixed": [], "changed": [], "added": [], "removed": [], "slower": [], "faster": [],
+            "unchanged": 0}
+    for nodeid, (feature, name, status, duration) in _collapse_results(head_path).items():
+        row = {"nodeid": nodeid, "feature": feature, "name": name, "status": status, "duration": duration}
+        old = base.pop(nodeid, None)
+        if old is None:
+            diff["added"].append(row)
+            continue
+        _, _, old_status, old_duration = old
+        row.update(old_status=old_status, old_duration=old_duration, delta=round(duration - old_duration, 3))
+        if old_status != status:
+            if status in FAILING and old_status not in FAILING:
+                diff["regressed"].append(row)
+            elif old_status in FAILING and status == "passed":
+                diff["fixed"].append(row)
+            else:
+                diff["changed"].append(row)
+        elif status != "skipped" and abs(row["delta"]) >= threshold:
+            diff["slower" if row["delta"] > 0 else "faster"].append(row)
+        else:
+            diff["unchanged"] += 1
+    # 基线里剩下的就是这次没有运行的场景
+    diff["removed"] = [{"nodeid": nodeid, "feature": feature, "name": name, "status": status, "duration": duration}
+                       for nodeid, (feature, name, status, duration) in base.items()]
+
+    for kind in ("regressed", "fixed", "changed", "added", "removed"):
+        diff[kind].sort(key=lambda r: (conftest.get_sort_key(r["feature"]), conftest.get_sort_key(r["name"])))
+    diff["slower"].sort(key=lambda r: r["delta"], reverse=True)
+    diff["faster"].sort(key=lambda r: r["delta"])
+    return diff
+
+
+DIFF_SECTIONS = (
+    ("regressed", "Newly Failing", "bg-danger"),
+    ("fixed", "Fixed", "bg-primary"),
+    ("changed", "Other Status Changes", "bg-secondary"),
+    ("slower", "Slower", "bg-danger"),
+    ("faster", "Faster", "bg-primary"),
+    ("added", "New Scenarios", "bg-secondary"),
+    ("removed", "Removed Scenarios", "bg-secondary"),
+)
+
+DIFF_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Report Diff</title>
+    <style>{{ vendor_css }}</style>
+    <style>
+        body { background-color: #f8f9fa; }
+        .card { margin-bottom: 20px; }
+        .nodeid { font-family: monospace; font-size: 0.8em; color: #6c757d; }
+    </style>
+</head>
+<body class="p-4">
+<div class="container-fluid">
+    <h3>Report Diff</h3>
+    <p class="text-muted">
+        base <strong>{{ base | e }}</strong> &rarr; head <strong>{{ head | e }}</strong>
+        &middot; duration threshold {{ threshold }}s &middot; {{ diff.unchanged }} unchanged
+    </p>
+    {% for kind, title, badge in sections %}
+    {% set rows = diff[kind] %}
+    <div class="card">
+        <div class="card-header">{{ title }} <span class="badge {{ badge }}">{{ rows | length }}</span></div>
+        {% if rows %}
+        <div class="card-body p-0">
+            <table class="table table-sm mb-0">
+                <thead>
+                    <tr><th>Feature</th><th>Scenario</th><th>Status</th><th>Duration (s)</th></tr>
+                </thead>
+                <tbody>
+                    {% for r in rows %}
+                    <tr>
+                        <td>{{ r.feature | e }}</td>
+                        <td>{{ r.name | e }}<div class="nodeid">{{ r.nodeid | e }}</div></td>
+                        <td>{% if r.old_status and r.old_status != r.status %}{{ r.old_status }} &rarr; {% endif %}{{ r.status }}</td>
+                        <td>
+                            {% if r.old_duration is defined %}{{ r.old_duration }} &rarr; {{ r.duration }}
+                            <span class="{{ 'text-danger' if r.delta > 0 else 'text-primary' }}">({{ '%+.3f' | format(r.delta) }})</span>
+                            {% else %}{{ r.duration }}{% endif %}
+                        </td>
+                    </tr>
+                    {% endfor %}
+                </tbody>
+            </table>
+        </div>
+        {% endif %}
+    </div>
+    {% endfor %}
+</div>
+</body>
+</html>
+"""
+
+
+def cmd_diff(args):
+    diff = diff_results(args.base, args.head, args.threshold)
+    template = conftest._get_template(DIFF_TEMPLATE)
+    html = template.render(diff=diff, sections=DIFF_SECTIONS, base=args.base, head=args.head,
+                           threshold=args.threshold, vendor_css=conftest._vendor_css())
+    output = os.path.abspath(args.output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(html)
+    print(", ".join(f"{len(diff[kind])} {title.lower()}" for kind, title, _ in DIFF_SECTIONS))
+    print(f"Diff written to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    merge = subparsers.add_parser("merge", help="Combine report dumps from several runs into one report.")
+    merge.add_argument("dumps", nargs="+", help="JSON Lines dumps written with --report-dump")
+    merge.add_argument("-o", "--output", default="report.html", help="Merged report (default: %(default)s)")
+    merge.add_argument("--db", help="Keep the merged results in this SQLite database")
+    merge.add_argument("--offline", action="store_true", help="Self-contained report (see --report-offline)")
+    merge.add_argument("--compress", action="store_true", help="Compress the data island (see --report-compress)")
+    merge.add_argument("--split-threshold", type=int, default=conftest.report_options["split_threshold"],
+                       help="Split into per-feature pages above this many scenarios (default: %(default)s)")
+    merge.set_defaults(func=cmd_merge)
+
+    diff = subparsers.add_parser("diff", help="Compare two runs: status transitions and duration changes.")
+    diff.add_argument("base", help="Baseline run: a --report-dump file or a --report-db database")
+    diff.add_argument("head", help="Run to compare against the baseline")
+    diff.add_argument("-o", "--output", default="report-diff.html", help="Diff report (default: %(default)s)")
+    diff.add_argument("--threshold", type=float, default=1.0,
+                      help="Report duration changes of at least this many seconds (default: %(default)s)")
+    diff.set_defaults(func=cmd_diff)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Builders for the fake pytest reports and sessions used by the report plugin tests."""
+import json
+from types import SimpleNamespace
+
+import conftest
+
+
+def fake_report(name="test_a", when="call", outcome="passed", duration=0.5, feature="1.1. Login",
+                longrepr=None, steps=None, markers=(), **extra):
+    """A report shaped like the ones ``pytest_runtest_makereport`` attaches the report data to."""
+    return SimpleNamespace(
+        nodeid=f"tests/step_defs/test_login.py::{name}",
+        when=when,
+        outcome=outcome,
+        longrepr=longrepr,
+        sections=[],
+        duration=duration,
+        feature_name=feature,
+        scenario_name=name,
+        extra_steps=steps if steps is not None else [],
+        extra_markers=list(markers),
+        **extra,
+    )
+
+
+def fake_session(reports, db_path=None):
+    """A finalized ``TestSessionReport`` holding ``reports``."""
+    session = conftest.TestSessionReport(db_path=db_path)
+    for report in reports:
+        session.record_phase(report)
+        session.add_result(report)
+    session.finalize()
+    return session
+
+
+def report_data(html):
+    """The parsed JSON data island of a rendered (uncompressed) report page."""
+    start = html.index('<script type="application/json" id="report-data">')
+    start = html.index(">", start) + 1
+    return json.loads(html[start:html.index("</script>", start)])
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import conftest
+from report_factory import fake_report
+
+NODEID = "tests/step_defs/test_login.py::test_cache"
+
+
+def _make_report(item, when):
+    report = SimpleNamespace(when=when, outcome="passed", nodeid=item.nodeid)
+    hook = conftest.pytest_runtest_makereport(item, SimpleNamespace(start=1.0, stop=2.0))
+    next(hook)
+    try:
+        hook.send(SimpleNamespace(get_result=lambda: report))
+    except StopIteration:
+        pass
+    return report
+
+
+def test_step_cache_is_released_at_teardown():
+    item = SimpleNamespace(nodeid=NODEID, b64_screenshot="c2NyZWVu")
+    conftest.get_step_cache(NODEID).append({"name": "step", "logs": [[0.0, "INFO", "x" * 100]]})
+
+    report = _make_report(item, "teardown")
+
+    assert NODEID not in conftest.step_execution_cache
+    assert not hasattr(item, "b64_screenshot")
+    assert report.extra_plugin_cache["entries"] == len(conftest.step_execution_cache)
+
+
+def test_plugin_cache_usage_is_summarised_per_process():
+    session = conftest.TestSessionReport()
+    for worker, size in (("gw0", 4096), ("gw1", 2048), ("gw0", 1024)):
+        session.record_plugin_cache(fake_report(when="teardown", worker_id=worker,
+                                                extra_plugin_cache={"entries": 1, "bytes": size}))
+
+    # 每个进程只保留最近一次的占用，峰值单独记录
+    assert session.plugin_cache_summary() == "2 entries / 3.0 KB across 2 process(es), peak 4.0 KB"
@@ -0,0 +1,54 @@
+import math
+import re
+
+import conftest
+from report_factory import fake_report, fake_session
+
+
+def _dash_lengths(svg):
+    return [float(length) for length in re.findall(r'stroke-dasharray="([\d.]+) ', svg)]
+
+
+def test_donut_segments_are_proportional_to_their_values():
+    svg = conftest._svg_donut([("Passed", 6, "#0f0"), ("Failed", 2, "#f00"), ("Skipped", 0, "#999")],
+                              size=100, thickness=20)
+    circumference = 2 * math.pi * 40
+
+    lengths = _dash_lengths(svg)
+    assert lengths == [round(circumference * 0.75, 2), round(circumference * 0.25, 2), 0.0]
+    # 后一段接在前一段之后
+    assert re.findall(r'stroke-dashoffset="([-\d.]+)"', svg)[1] == f"{-circumference * 0.75:.2f}"
+    assert ">8</text>" in svg
+    assert "<title>Failed: 2</title>" in svg
+
+
+def test_empty_donut_has_zero_length_segments():
+    svg = conftest._svg_donut([("Passed", 0, "#0f0"), ("Failed", 0, "#f00")])
+    assert _dash_lengths(svg) == [0.0, 0.0]
+    assert ">0</text>" in svg
+
+
+def test_sparkline_keeps_the_slowest_scenario_of_each_bucket():
+    durations = [0.1] * 100
+    durations[57] = 9.0
+    svg = conftest._svg_sparkline(durations, width=100, height=22, max_points=10)
+
+    points = re.search(r'points="([^"]+)"', svg).group(1).split()
+    assert len(points) == 10
+    # 桶取最大值：慢场景所在的桶画在最高处 (y 最小)
+    ys = [float(point.split(",")[1]) for point in points]
+    assert ys.index(min(ys)) == 5 and min(ys) == 2.0
+    assert "100 scenarios, total 18.90s, max 9.00s" in svg
+    assert conftest._svg_sparkline([]) == ""
+
+
+def test_report_embeds_the_charts_without_a_chart_library(tmp_path, monkeypatch):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    session = fake_session([fake_report("test_a"), fake_report("test_b", outcome="failed", longrepr="E   boom")])
+    conftest.generate_html_report(session, output_path=str(output))
+    html = output.read_text(encoding="utf-8")
+
+    assert html.count('class="donut-seg"') == 8
+    assert "<title>Failed: 1</title>" in html
+    assert "<script src=" not in html
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+import conftest
+from report_factory import fake_report, fake_session
+
+
+@pytest.mark.parametrize("q", conftest.DURATION_QUANTILES)
+def test_digest_quantiles_are_close_to_the_exact_ones(q):
+    random.seed(7)
+    values = [random.lognormvariate(0, 1) for _ in range(20000)]
+    digest = conftest._TDigest()
+    for value in values:
+        digest.add(value)
+
+    exact = sorted(values)[int(q * len(values))]
+    assert digest.quantile(q) == pytest.approx(exact, rel=0.03)
+    assert digest.count == 20000 and digest.total == pytest.approx(sum(values))
+    # 质心数受 compression 限制，不随样本数增长
+    assert len(digest.centroids) < 10 * digest.compression
+
+
+def test_digest_of_few_values_is_exact_at_the_ends():
+    digest = conftest._TDigest()
+    for value in (3.0, 1.0, 2.0):
+        digest.add(value)
+    assert digest.quantile(0) == 1.0
+    assert digest.quantile(0.5) == 2.0
+    assert digest.quantile(1) == 3.0
+    assert conftest._TDigest().quantile(0.5) == 0.0
+
+
+def test_slowest_scenarios_keep_the_top_n():
+    session = conftest.TestSessionReport()
+    session.slowest_limit = 3
+    for i in range(10):
+        session.add_result(fake_report(f"test_{i}", duration=(i * 7) % 10))
+    session.finalize()
+
+    assert [(s["name"], s["duration"]) for s in session.slowest_scenarios()] == \
+        [("test_7", 9), ("test_4", 8), ("test_1", 7)]
+
+
+def test_percentiles_by_feature_and_marker_skip_skipped_scenarios():
+    session = fake_session([
+        fake_report("test_a", feature="1.1. Login", duration=1.0, markers=("smoke",)),
+        fake_report("test_b", feature="1.1. Login", duration=3.0),
+        fake_report("test_c", feature="2.1. Search", duration=4.0, markers=("smoke",)),
+        fake_report("test_d", feature="2.1. Search", duration=50.0, outcome="skipped"),
+    ])
+
+    overall, features, markers = session.duration_percentiles()
+
+    assert (overall["count"], overall["total"]) == (3, 8.0)
+    assert [(f["name"], f["count"], f["total"], f["share"]) for f in features] == \
+        [("1.1. Login", 2, 4.0, 50.0), ("2.1. Search", 1, 4.0, 50.0)]
+    assert [(m["name"], m["count"], m["total"]) for m in markers] == [("smoke", 2, 5.0)]
+    assert features[1]["quantiles"] == [4.0, 4.0, 4.0]
@@ -0,0 +1,59 @@
+import sqlite3
+from types import SimpleNamespace
+
+import conftest
+from report_factory import fake_report, fake_session
+
+
+def _stored(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT nodeid, run_id, status, duration FROM durations ORDER BY run_id").fetchall()
+
+
+def test_call_failure_with_teardown_error_is_stored_once(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    session = fake_session([
+        fake_report("test_a", outcome="failed", longrepr="AssertionError"),
+        fake_report("test_a", when="teardown", outcome="failed", longrepr="RuntimeError", duration=0.1),
+    ])
+
+    history = conftest.DurationHistory(path)
+    history.record_run(session)
+    history.close()
+
+    assert _stored(path) == [("tests/step_defs/test_login.py::test_a", 1, "error", 0.1)]
+
+
+def test_slow_run_is_flagged_against_passing_history(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    history = conftest.DurationHistory(path)
+    for duration in (1.0, 1.02, 0.98, 1.01, 0.99):
+        assert history.record_run(fake_session([fake_report("test_a", duration=duration)])) == []
+
+    regressions = history.record_run(fake_session([fake_report("test_a", duration=3.0)]))
+    history.close()
+
+    assert [r["nodeid"] for r in regressions] == ["tests/step_defs/test_login.py::test_a"]
+    assert regressions[0]["median"] == 1.0
+    assert regressions[0]["samples"] == 5
+
+
+def test_too_few_samples_are_not_flagged(tmp_path):
+    history = conftest.DurationHistory(str(tmp_path / "history.sqlite"))
+    history.record_run(fake_session([fake_report("test_a", duration=1.0)]))
+    assert history.record_run(fake_session([fake_report("test_a", duration=9.0)])) == []
+    history.close()
+
+
+def test_broken_history_does_not_stop_the_report(tmp_path, monkeypatch, capsys):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    # 目录不能作为 SQLite 数据库打开
+    monkeypatch.setitem(conftest.report_options, "history_path", str(tmp_path))
+    monkeypatch.setattr(conftest, "_master_report_data", fake_session([fake_report("test_a")]))
+    monkeypatch.setattr(conftest, "_live_report", None)
+
+    conftest.pytest_sessionfinish(SimpleNamespace(config=SimpleNamespace()), 0)
+
+    assert output.exists()
+    assert "Failed to update duration history" in capsys.readouterr().out
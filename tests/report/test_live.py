@@ -0,0 +1,48 @@
+import json
+import os
+
+import conftest
+from report_factory import fake_report, fake_session
+
+
+def _chunk_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line[len("reportLive.push("):-len(");\n")]) for line in f]
+
+
+def test_each_flush_writes_only_the_new_results_to_the_next_chunk(tmp_path):
+    session = conftest.TestSessionReport()
+    live = conftest.LiveReportWriter(str(tmp_path / "report.html"), interval=60, batch_size=2)
+    for name in ("test_a", "test_b", "test_c"):
+        report = fake_report(name)
+        live.add(report.feature_name, session.add_result(report))
+    live.flush()
+
+    chunks = sorted(os.listdir(tmp_path / "report-live"))
+    assert chunks == ["000001.js", "000002.js"]
+    first, second = (_chunk_rows(tmp_path / "report-live" / name) for name in chunks)
+    assert [row[1] for row in first] == ["test_a", "test_b"]
+    assert [row[1] for row in second] == ["test_c"]
+
+
+def test_flush_without_new_results_writes_no_chunk(tmp_path):
+    live = conftest.LiveReportWriter(str(tmp_path / "report.html"), interval=0, batch_size=10)
+    live.maybe_flush()
+    live.flush()
+    assert os.listdir(tmp_path / "report-live") == []
+
+
+def test_close_removes_the_chunks(tmp_path):
+    live = conftest.LiveReportWriter(str(tmp_path / "report.html"), interval=60, batch_size=1)
+    live.add("1.1. Login", fake_session([fake_report()]).features["1.1. Login"]["scenarios"][0])
+    live.close()
+    assert not os.path.exists(tmp_path / "report-live")
+
+
+def test_live_page_points_at_the_chunk_directory(tmp_path, monkeypatch):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    live = conftest.LiveReportWriter(str(output), interval=2.5, batch_size=10)
+    conftest.generate_html_report(fake_session([]), output_path=str(output), live=live)
+
+    assert '"live":{"src":"report-live","interval":2500}' in output.read_text(encoding="utf-8")
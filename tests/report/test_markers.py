@@ -0,0 +1,25 @@
+import conftest
+from report_factory import fake_report, fake_session, report_data
+
+
+def test_marker_words_set_one_bit_per_marker():
+    marker_bits = {f"m{i:02d}": i for i in range(40)}
+
+    assert conftest._marker_words([], marker_bits) == [0, 0]
+    assert conftest._marker_words(["m00", "m05"], marker_bits) == [0b100001, 0]
+    # 第 32 个以后的 marker 落在下一个字
+    assert conftest._marker_words(["m31", "m32", "m39"], marker_bits) == [1 << 31, 0b10000001]
+    assert conftest._marker_words([], {}) == [0]
+
+
+def test_report_rows_carry_marker_bitsets(tmp_path, monkeypatch):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    session = fake_session([fake_report("test_a", markers=("smoke", "p1")), fake_report("test_b", markers=("p3",)),
+                            fake_report("test_c")])
+    conftest.generate_html_report(session, output_path=str(output))
+
+    data = report_data(output.read_text(encoding="utf-8"))
+    assert data["markers"] == ["p1", "p3", "smoke"]
+    field = data["fields"].index("markers")
+    assert [row[field] for row in data["scenarios"]] == [[0b101], [0b010], [0]]
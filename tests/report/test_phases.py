@@ -0,0 +1,89 @@
+import pytest
+
+import conftest
+from report_factory import fake_report, fake_session, report_data
+
+
+def _phases(name, start, outcome="passed", feature="1.1. Login"):
+    """setup 0.25s、call 1s、teardown 0.5s 的三个阶段报告"""
+    return [
+        fake_report(name, when="setup", feature=feature, extra_phase=[start, start + 0.25], extra_worker="gw1"),
+        fake_report(name, when="call", outcome=outcome, feature=feature, extra_phase=[start + 0.25, start + 1.25],
+                    extra_worker="gw1", longrepr="E   AssertionError" if outcome == "failed" else None),
+        fake_report(name, when="teardown", feature=feature, extra_phase=[start + 1.25, start + 1.75],
+                    extra_worker="gw1"),
+    ]
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(conftest, "_master_report_data", conftest.TestSessionReport())
+    monkeypatch.setattr(conftest, "_pending_reports", {})
+    return conftest._master_report_data
+
+
+def _scenarios(report):
+    return {s["name"]: s for _, feature in report.sorted_features() for s in feature["scenarios"]}
+
+
+def test_result_carries_all_three_phases_once_teardown_arrives(session):
+    setup, call, teardown = _phases("test_a", 10.0)
+    conftest.pytest_runtest_logreport(setup)
+    conftest.pytest_runtest_logreport(call)
+    assert session.features == {}
+
+    conftest.pytest_runtest_logreport(teardown)
+
+    scenario = _scenarios(session)["test_a"]
+    assert scenario["phases"] == {"setup": 0.25, "call": 1.0, "teardown": 0.5}
+    assert scenario["worker"] == "gw1"
+
+
+def test_skipped_phases_are_none():
+    report = fake_report("test_a", extra_phase=[5.0, 5.5], extra_worker="gw0")
+    scenario = _scenarios(fake_session([report]))["test_a"]
+    assert scenario["phases"] == {"setup": None, "call": 0.5, "teardown": None}
+
+
+def test_phases_survive_the_sqlite_store(tmp_path):
+    report = fake_session(_phases("test_a", 0.0)[1:2], db_path=str(tmp_path / "results.sqlite"))
+    assert _scenarios(report)["test_a"]["phases"]["call"] == 1.0
+
+
+def test_details_row_fields_come_from_the_scenario(tmp_path, monkeypatch):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    monkeypatch.setitem(conftest.report_options, "split_threshold", 1)
+    report = conftest.TestSessionReport()
+    for n, feature in enumerate(("1.1. Login", "2.1. Search")):
+        setup, call, teardown = _phases(f"test_{n}", 10.0 * n, feature=feature)
+        for phase_report in (setup, call, teardown):
+            report.record_phase(phase_report)
+        report.add_result(call)
+    report.finalize()
+
+    conftest.generate_html_report(report, output_path=str(output))
+
+    # 分页后页面里没有全局时间轴，阶段耗时随场景行一起输出
+    page = report_data((tmp_path / "report-pages" / "feature-0002.html").read_text(encoding="utf-8"))
+    fields = page["fields"]
+    row = page["scenarios"][0]
+    assert row[fields.index("phases")] == [0.25, 1.0, 0.5]
+    assert row[fields.index("worker")] == "gw1"
+
+
+def test_phase_and_fixture_costs_are_totalled_over_the_session():
+    report = conftest.TestSessionReport()
+    for n in range(2):
+        setup, call, teardown = _phases(f"test_{n}", 10.0 * n)
+        setup.extra_fixtures = [["page", "function", 0.2], ["browser", "session", 0.05 if n else 3.0]]
+        for phase_report in (setup, call, teardown):
+            report.record_phase(phase_report)
+
+    phases, fixtures = report.phase_costs()
+
+    assert phases == [{"name": "setup", "total": 0.5, "share": 14.3},
+                      {"name": "call", "total": 2.0, "share": 57.1},
+                      {"name": "teardown", "total": 1.0, "share": 28.6}]
+    assert [(f["name"], f["scope"], f["count"], f["total"], f["max"]) for f in fixtures] == \
+        [("browser", "session", 2, 3.05, 3.0), ("page", "function", 2, 0.4, 0.2)]
@@ -0,0 +1,132 @@
+import base64
+import gzip
+import json
+import re
+
+import pytest
+
+import conftest
+from report_factory import fake_report, fake_session, report_data
+
+
+def _session(count=30):
+    return fake_session([fake_report(f"test_{i:02d}", feature=f"{i % 4 + 1}.1. Feature {i % 4}",
+                                     outcome="failed" if i % 5 == 0 else "passed",
+                                     longrepr=f"E   AssertionError: {i}" if i % 5 == 0 else None)
+                         for i in range(count)])
+
+
+@pytest.fixture
+def output(tmp_path, monkeypatch):
+    path = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(path))
+    return path
+
+
+def test_streamed_report_matches_the_rendered_one(output, monkeypatch):
+    session = _session()
+    conftest.generate_html_report(session, output_path=str(output))
+    rendered = output.read_text(encoding="utf-8")
+
+    monkeypatch.setitem(conftest.report_options, "stream", True)
+    conftest.generate_html_report(session, output_path=str(output))
+
+    assert output.read_text(encoding="utf-8") == rendered
+    assert len(report_data(rendered)["scenarios"]) == 30
+
+
+def test_report_data_is_yielded_one_row_per_chunk():
+    session = _session(6)
+    chunks = list(conftest._iter_report_data(session.sorted_features(), traces=session.traces))
+    rows = [chunk for chunk in chunks if "tests/step_defs/test_login.py::" in chunk]
+    assert len(rows) == 6
+    assert all(chunk.count("::") == 1 for chunk in rows)
+
+
+def test_template_is_compiled_once_per_source(tmp_path, monkeypatch):
+    monkeypatch.setattr(conftest, "_compiled_templates", {})
+    monkeypatch.setitem(conftest.report_options, "template_cache_dir", str(tmp_path))
+
+    template = conftest._get_template("<p>{{ name }}</p>")
+    assert conftest._get_template("<p>{{ name }}</p>") is template
+    assert conftest._get_template("<b>{{ name }}</b>") is not template
+    assert template.render(name="x") == "<p>x</p>"
+
+
+def test_compiled_template_is_kept_in_the_bytecode_cache(tmp_path, monkeypatch):
+    monkeypatch.setitem(conftest.report_options, "template_cache_dir", str(tmp_path))
+    monkeypatch.setattr(conftest, "_compiled_templates", {})
+    conftest._get_template(conftest.HTML_TEMPLATE)
+    cached = sorted(tmp_path.iterdir())
+    assert len(cached) == 1
+
+    # 新进程 (这里清空内存缓存模拟) 直接加载字节码，不再编译
+    def compile(*args, **kwargs):
+        raise AssertionError("template compiled again")
+    monkeypatch.setattr(conftest.Environment, "compile", compile)
+    monkeypatch.setattr(conftest, "_compiled_templates", {})
+    conftest._get_template(conftest.HTML_TEMPLATE)
+    assert sorted(tmp_path.iterdir()) == cached
+
+
+def test_offline_report_has_no_external_references(output, monkeypatch):
+    monkeypatch.setitem(conftest.report_options, "offline", True)
+    conftest.generate_html_report(_session(), output_path=str(output))
+    html = output.read_text(encoding="utf-8")
+
+    # 不加载任何外部资源 (SVG 的 xmlns 不算)
+    assert not re.search(r"""(src|href)=["']?https?:|url\(["']?https?:|@import""", html)
+    assert conftest._vendor_css() in html
+    assert len(report_data(html)["scenarios"]) == 30
+
+
+def test_offline_bundle_minifies_the_inline_blocks():
+    source = conftest._offline_template_source(conftest.HTML_TEMPLATE)
+
+    assert len(source) < len(conftest.HTML_TEMPLATE)
+    # 整行注释被去掉，模板变量保持不变
+    assert "\n    // " not in source
+    assert "{{ stats.total }}" in source
+    assert conftest._minify_css("a { color: red; }\n/* x */ b > i { margin : 0 ; }") == "a{color:red}b>i{margin:0}"
+
+
+def _island(html):
+    start = html.index(">", html.index('id="report-data"')) + 1
+    return html[start:html.index("</script>", start)]
+
+
+def test_compressed_report_data_decodes_to_the_plain_data(output, monkeypatch):
+    session = _session()
+    conftest.generate_html_report(session, output_path=str(output))
+    plain = report_data(output.read_text(encoding="utf-8"))
+
+    monkeypatch.setitem(conftest.report_options, "compress", True)
+    conftest.generate_html_report(session, output_path=str(output))
+    html = output.read_text(encoding="utf-8")
+
+    assert 'id="report-data" data-encoding="gzip">' in html
+    assert json.loads(gzip.decompress(base64.b64decode(_island(html)))) == plain
+    # CI 归档用的 gzip 副本
+    assert gzip.decompress((output.parent / "report.html.gz").read_bytes()).decode("utf-8") == html
+
+
+def test_gzip_base64_chunks_join_into_one_stream():
+    chunks = [f'{{"row":{i}}},' * (i + 1) for i in range(50)]
+    encoded = list(conftest._iter_gzip_base64(chunks))
+
+    assert len(encoded) > 1
+    assert gzip.decompress(base64.b64decode("".join(encoded))).decode("utf-8") == "".join(chunks)
+
+
+@pytest.mark.parametrize("store", ["memory", "sqlite"])
+def test_render_jobs_produce_the_same_report(output, monkeypatch, tmp_path, store):
+    session = _session() if store == "memory" else fake_session(
+        [fake_report(f"test_{i:02d}", feature=f"{i % 4 + 1}.1. Feature {i % 4}") for i in range(30)],
+        db_path=str(tmp_path / "results.sqlite"))
+    conftest.generate_html_report(session, output_path=str(output))
+    serial = output.read_text(encoding="utf-8")
+
+    monkeypatch.setitem(conftest.report_options, "render_jobs", 3)
+    conftest.generate_html_report(session, output_path=str(output))
+
+    assert output.read_text(encoding="utf-8") == serial
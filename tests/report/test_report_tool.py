@@ -0,0 +1,162 @@
+import base64
+import io
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+import conftest
+import report_tool
+from report_factory import fake_report, fake_session, report_data
+
+
+@pytest.fixture
+def options(monkeypatch):
+    # report_tool 会改写全局选项，测试结束后还原
+    monkeypatch.setattr(conftest, "report_options", dict(conftest.report_options))
+    return conftest.report_options
+
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["report_tool.py", *argv])
+    report_tool.main()
+
+
+def _png(color):
+    if conftest.Image is None:
+        return b"\x89PNG fake " + bytes(color)
+    buffer = io.BytesIO()
+    conftest.Image.new("RGB", (64, 40), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _shard(root, n, options):
+    """Run a fake shard under ``root/ci/shard<n>``: report, screenshot assets and a dump in a sub-directory."""
+    shard_dir = root / "ci" / f"shard{n}"
+    options.update(report_path=str(shard_dir / "report.html"), assets=True)
+    url, thumb = conftest._store_screenshot(base64.b64encode(_png((n * 60, 0, 0))).decode())
+    conftest._drain_screenshot_jobs()
+    failed = fake_report(f"test_fail_{n}", outcome="failed", longrepr="E   AssertionError: boom",
+                         extra_screenshot_url=url, extra_screenshot_thumb=thumb,
+                         extra_phase=[100.0 + n, 101.0 + n], extra_worker="gw0",
+                         extra_fixtures=[["page", "function", 0.5]])
+    passed = fake_report(f"test_pass_{n}", feature="2.1. Search", extra_phase=[102.0, 103.0], extra_worker="gw1")
+    session = fake_session([failed, passed])
+    os.makedirs(shard_dir / "dump")
+    session.dump(str(shard_dir / "dump" / "report.jsonl"))
+    return shard_dir
+
+
+def test_merge_combines_shards_moved_to_another_directory(tmp_path, options, monkeypatch):
+    for n in (1, 2):
+        _shard(tmp_path, n, options)
+    # CI 把各分片作为 artifact 下载到别的目录
+    shutil.move(str(tmp_path / "ci"), str(tmp_path / "artifacts"))
+    output = tmp_path / "merged" / "report.html"
+
+    _run(monkeypatch, "merge", str(tmp_path / "artifacts/shard1/dump/report.jsonl"),
+         str(tmp_path / "artifacts/shard2/dump/report.jsonl"), "-o", str(output))
+
+    data = report_data(output.read_text(encoding="utf-8"))
+    fields = data["fields"]
+    rows = {row[fields.index("name")]: row for row in data["scenarios"]}
+    assert sorted(rows) == ["test_fail_1", "test_fail_2", "test_pass_1", "test_pass_2"]
+    for name in ("test_fail_1", "test_fail_2"):
+        for key in ("screenshot", "thumbnail"):
+            if rows[name][fields.index(key)]:
+                assert (output.parent / rows[name][fields.index(key)]).exists()
+    # 两个分片里相同的 traceback 合并后只存一份
+    assert data["traces"] == ["E   AssertionError: boom"]
+    assert data["timeline"]["workers"] == ["shard1:gw0", "shard1:gw1", "shard2:gw0", "shard2:gw1"]
+    assert rows["test_fail_2"][fields.index("phases")] == [None, 1.0, None]
+    assert rows["test_fail_2"][fields.index("worker")] == "shard2:gw0"
+
+
+def test_merge_keeps_fixture_costs(tmp_path, options, monkeypatch):
+    dumps = [str(_shard(tmp_path, n, options) / "dump" / "report.jsonl") for n in (1, 2)]
+    report = conftest.TestSessionReport()
+    for n, path in enumerate(dumps, 1):
+        report_tool.merge_dump(report, path, str(tmp_path / "merged"), shard=f"shard{n}")
+
+    assert report.fixture_stats == {"page": ["function", 2, 1.0, 0.5]}
+    assert report.timeline["tests/step_defs/test_login.py::test_fail_2"][0] == "shard2:gw0"
+
+
+def test_dump_records_the_report_directory_relative_to_the_dump(tmp_path, options):
+    shard_dir = _shard(tmp_path, 1, options)
+    with open(shard_dir / "dump" / "report.jsonl", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+    assert header["version"] == conftest.DUMP_VERSION
+    assert header["report_dir"] == ".."
+
+
+def test_merge_rejects_files_that_are_not_dumps(tmp_path, options, monkeypatch):
+    bogus = tmp_path / "results.jsonl"
+    bogus.write_text('{"type": "scenario"}\n', encoding="utf-8")
+    with pytest.raises(SystemExit, match="not a report dump"):
+        _run(monkeypatch, "merge", str(bogus), "-o", str(tmp_path / "report.html"))
+
+
+def _runs(tmp_path, options):
+    """A baseline dump and a head ``--report-db`` database covering every kind of difference."""
+    options.update(report_path=str(tmp_path / "report.html"))
+    base = fake_session([fake_report("test_regressed"), fake_report("test_fixed", outcome="failed"),
+                         fake_report("test_changed"), fake_report("test_slower", duration=1.0),
+                         fake_report("test_faster", duration=3.0), fake_report("test_same", duration=1.0),
+                         fake_report("test_removed")])
+    base.dump(str(tmp_path / "base.jsonl"))
+    fake_session([fake_report("test_regressed", outcome="failed"), fake_report("test_fixed"),
+                  fake_report("test_changed", outcome="skipped"), fake_report("test_slower", duration=3.0),
+                  fake_report("test_faster", duration=1.0), fake_report("test_same", duration=1.5),
+                  fake_report("test_added")], db_path=str(tmp_path / "head.sqlite"))
+    return str(tmp_path / "base.jsonl"), str(tmp_path / "head.sqlite")
+
+
+def test_diff_groups_scenarios_by_kind_of_change(tmp_path, options):
+    diff = report_tool.diff_results(*_runs(tmp_path, options), threshold=1.0)
+
+    names = {kind: [row["name"] for row in rows] for kind, rows in diff.items() if kind != "unchanged"}
+    assert names == {"regressed": ["test_regressed"], "fixed": ["test_fixed"], "changed": ["test_changed"],
+                     "slower": ["test_slower"], "faster": ["test_faster"], "added": ["test_added"],
+                     "removed": ["test_removed"]}
+    assert diff["unchanged"] == 1
+    assert diff["slower"][0]["delta"] == 2.0
+    assert (diff["regressed"][0]["old_status"], diff["regressed"][0]["status"]) == ("passed", "failed")
+
+
+def test_diff_command_writes_a_report(tmp_path, options, monkeypatch, capsys):
+    base, head = _runs(tmp_path, options)
+    output = tmp_path / "diff" / "report-diff.html"
+
+    _run(monkeypatch, "diff", base, head, "-o", str(output), "--threshold", "3")
+
+    html = output.read_text(encoding="utf-8")
+    assert "Newly Failing <span class=\"badge bg-danger\">1</span>" in html
+    # 阈值 3s 时耗时变化都算 unchanged
+    assert "Slower <span class=\"badge bg-danger\">0</span>" in html
+    assert "1 newly failing, 1 fixed, 1 other status changes, 0 slower, 0 faster" in capsys.readouterr().out
+
+
+def _failing_twice(name, duration):
+    # call 失败后 teardown 又出错：同一 nodeid 两条结果
+    return [fake_report(name, outcome="failed", duration=duration, longrepr="E   AssertionError: call"),
+            fake_report(name, when="teardown", outcome="failed", duration=0.1, longrepr="E   RuntimeError: teardown")]
+
+
+def test_diff_collapses_call_failure_and_teardown_error_into_one_row(tmp_path, options):
+    options.update(report_path=str(tmp_path / "report.html"))
+    fake_session([fake_report("test_breaks", duration=2.0), *_failing_twice("test_recovers", 2.0)]) \
+        .dump(str(tmp_path / "base.jsonl"))
+    fake_session([*_failing_twice("test_breaks", 2.0), fake_report("test_recovers", duration=2.0)]) \
+        .dump(str(tmp_path / "head.jsonl"))
+
+    diff = report_tool.diff_results(str(tmp_path / "base.jsonl"), str(tmp_path / "head.jsonl"), threshold=1.0)
+
+    assert diff["added"] == [] and diff["removed"] == []
+    assert [(r["name"], r["old_status"], r["status"], r["delta"]) for r in diff["regressed"]] == \
+        [("test_breaks", "passed", "error", 0.0)]
+    assert [(r["name"], r["old_status"], r["status"], r["delta"]) for r in diff["fixed"]] == \
+        [("test_recovers", "error", "passed", 0.0)]
+    assert diff["slower"] == diff["faster"] == []
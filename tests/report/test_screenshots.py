@@ -0,0 +1,86 @@
+import base64
+import hashlib
+import io
+
+import pytest
+
+import conftest
+from report_factory import fake_report, fake_session, report_data
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 400), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def assets(tmp_path, monkeypatch):
+    monkeypatch.setitem(conftest.report_options, "report_path", str(tmp_path / "report.html"))
+    monkeypatch.setitem(conftest.report_options, "screenshot_format", "webp")
+    return tmp_path
+
+
+def _stored(b64):
+    url, thumb = conftest._store_screenshot(b64)
+    conftest._drain_screenshot_jobs()
+    return url, thumb
+
+
+def test_screenshot_is_transcoded_with_a_thumbnail(assets):
+    if not conftest._can_encode("WEBP"):
+        pytest.skip("Pillow built without WebP support")
+    url, thumb = _stored(base64.b64encode(_png()).decode())
+
+    assert url.endswith(".webp") and thumb.endswith(".thumb.webp")
+    assert (assets / url).read_bytes()[:4] == b"RIFF"
+    with Image.open(assets / thumb) as img:
+        assert img.size[0] <= conftest.THUMBNAIL_SIZE[0] and img.size[1] <= conftest.THUMBNAIL_SIZE[1]
+    assert conftest._screenshot_urls(url, thumb) == (url, thumb)
+
+
+def test_identical_screenshots_share_one_asset(assets):
+    b64 = base64.b64encode(_png()).decode()
+    assert _stored(b64) == _stored(b64)
+
+
+def test_asset_is_named_by_the_digest_of_the_screenshot(assets, monkeypatch):
+    monkeypatch.setattr(conftest, "_can_encode", lambda pil_format: False)
+    png = _png()
+    url, _ = _stored(base64.b64encode(png).decode())
+    assert url == f"report-assets/{hashlib.sha256(png).hexdigest()}.png"
+
+
+def test_report_links_the_asset_instead_of_inlining_it(assets, monkeypatch):
+    monkeypatch.setattr(conftest, "_can_encode", lambda pil_format: False)
+    url, thumb = _stored(base64.b64encode(_png()).decode())
+    session = fake_session([fake_report(outcome="failed", longrepr="E   boom", extra_screenshot_url=url,
+                                        extra_screenshot_thumb=thumb)])
+    conftest.generate_html_report(session, output_path=str(assets / "report.html"))
+
+    html = (assets / "report.html").read_text(encoding="utf-8")
+    data = report_data(html)
+    assert data["scenarios"][0][data["fields"].index("screenshot")] == url
+    assert "data:image/png;base64" not in html
+
+
+def test_missing_encoder_keeps_the_png(assets, monkeypatch):
+    monkeypatch.setattr(conftest, "_can_encode", lambda pil_format: False)
+    png = _png()
+    url, thumb = _stored(base64.b64encode(png).decode())
+
+    assert url.endswith(".png") and thumb is None
+    assert (assets / url).read_bytes() == png
+
+
+def test_failed_transcode_writes_the_original_as_png(assets):
+    asset_dir = assets / "report-assets"
+    asset_dir.mkdir()
+    conftest._transcode_screenshot(b"not an image", str(asset_dir / "abc.webp"), str(asset_dir / "abc.thumb.webp"),
+                                   "WEBP", 80)
+
+    assert sorted(p.name for p in asset_dir.iterdir()) == ["abc.png"]
+    assert conftest._screenshot_urls("report-assets/abc.webp", "report-assets/abc.thumb.webp") == \
+        ("report-assets/abc.png", None)
@@ -0,0 +1,43 @@
+import itertools
+
+import conftest
+from report_factory import fake_report, fake_session, report_data
+
+LONG = "test_checkout_applies_the_loyalty_discount_after_tax_and_shipping"
+
+
+def _postings(search):
+    """Decode the delta-encoded postings into ``{token: [row, ...]}``."""
+    return {token: list(itertools.accumulate(deltas)) for token, deltas in zip(search["tokens"], search["postings"])}
+
+
+def test_tokenize_lowercases_splits_and_caps_token_length():
+    assert conftest._tokenize(["Login FAILED: user_name=Bob", None]) == {"login", "failed", "user_name", "bob"}
+    assert conftest._tokenize(["登录失败"]) == {"登", "录", "失", "败"}
+    assert conftest._tokenize([LONG]) == {LONG[:40]}
+
+
+def test_report_embeds_a_sorted_delta_encoded_index(tmp_path, monkeypatch):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    steps = [{"keyword": "Given", "name": "I open the cart", "status": "passed", "start": 0, "duration": 0.1,
+              "logs": [[1700000000.0, "INFO", "cart contains 3 items"]]}]
+    session = fake_session([
+        fake_report("test_a", outcome="failed", longrepr=f"E   KeyError in {LONG}"),
+        fake_report("test_b", steps=steps),
+        fake_report("test_c", outcome="failed", longrepr=f"E   KeyError in {LONG}"),
+    ])
+    conftest.generate_html_report(session, output_path=str(output))
+
+    search = report_data(output.read_text(encoding="utf-8"))["search"]
+    assert search["count"] == 3
+    assert search["tokens"] == sorted(search["tokens"])
+    postings = _postings(search)
+    # trace 文本只分词一次，但对每个引用它的场景都生效
+    assert postings["keyerror"] == [0, 2]
+    assert postings[LONG[:40]] == [0, 2]
+    assert LONG not in postings
+    # 步骤名和步骤日志 (不含时间前缀)
+    assert postings["cart"] == [1]
+    assert postings["items"] == [1]
+    assert postings["test_a"] == [0]
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import conftest
+from report_factory import fake_report, fake_session, report_data
+
+
+def _session(db_path=None):
+    reports = []
+    for i in range(12):
+        failed = i % 2 == 0
+        reports.append(fake_report(f"test_{i:02d}", feature=f"{i % 3 + 1}.1. Feature {i % 3}",
+                                   outcome="failed" if failed else "passed",
+                                   longrepr=f"E   AssertionError: failure {i}" if failed else None))
+    return fake_session(reports, db_path=db_path)
+
+
+@pytest.fixture
+def split(tmp_path, monkeypatch):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    monkeypatch.setitem(conftest.report_options, "split_threshold", 5)
+    return output
+
+
+def _page(output, n):
+    return report_data((output.parent / "report-pages" / f"feature-{n:04d}.html").read_text(encoding="utf-8"))
+
+
+def test_large_run_is_split_into_an_index_and_feature_pages(split):
+    conftest.generate_html_report(_session(), output_path=str(split))
+
+    index = report_data(split.read_text(encoding="utf-8"))
+    assert index["scenarios"] == []
+    assert index["pages"] == [f"report-pages/feature-{n:04d}.html" for n in (1, 2, 3)]
+    assert sorted(os.listdir(split.parent / "report-pages")) == ["feature-0001.html", "feature-0002.html",
+                                                                  "feature-0003.html"]
+    page = _page(split, 2)
+    fields = page["fields"]
+    assert [f["name"] for f in page["features"]] == ["2.1. Feature 1"]
+    assert {row[fields.index("feature")] for row in page["scenarios"]} == {0}
+    assert [row[fields.index("name")] for row in page["scenarios"]] == ["test_01", "test_04", "test_07", "test_10"]
+
+
+def test_run_summary_is_only_on_the_index(split):
+    conftest.generate_html_report(_session(), output_path=str(split))
+
+    index = split.read_text(encoding="utf-8")
+    assert 'id="stat-total">12<' in index and 'id="chart-cases"' in index
+    # Feature 页只有本 Feature 的场景，不显示整次运行的统计和环形图
+    page = (split.parent / "report-pages" / "feature-0002.html").read_text(encoding="utf-8")
+    assert 'id="stat-total"' not in page and 'id="stat-feature_total"' not in page
+    assert 'class="donut-seg"' not in page
+
+
+def test_feature_pages_embed_only_their_own_traces(split):
+    conftest.generate_html_report(_session(), output_path=str(split))
+
+    page = _page(split, 1)
+    trace_field = page["fields"].index("trace")
+    assert page["traces"] == ["E   AssertionError: failure 0", "E   AssertionError: failure 6"]
+    assert [row[trace_field] for row in page["scenarios"]] == [0, None, 1, None]
+
+
+def test_small_run_stays_on_one_page(split, monkeypatch):
+    monkeypatch.setitem(conftest.report_options, "split_threshold", 100)
+    conftest.generate_html_report(_session(), output_path=str(split))
+
+    assert len(report_data(split.read_text(encoding="utf-8"))["scenarios"]) == 12
+    assert not os.path.exists(split.parent / "report-pages")
+
+
+@pytest.mark.parametrize("store", ["memory", "sqlite"])
+def test_render_jobs_produce_the_same_pages(split, monkeypatch, tmp_path, store):
+    session = _session(str(tmp_path / "results.sqlite") if store == "sqlite" else None)
+    conftest.generate_html_report(session, output_path=str(split))
+    serial = [_page(split, n) for n in (1, 2, 3)]
+
+    monkeypatch.setitem(conftest.report_options, "render_jobs", 2)
+    conftest.generate_html_report(session, output_path=str(split))
+
+    assert [_page(split, n) for n in (1, 2, 3)] == serial
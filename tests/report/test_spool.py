@@ -0,0 +1,49 @@
+import base64
+
+import pytest
+
+import conftest
+from report_factory import fake_report, fake_session
+
+PNG = b"\x89PNG fake screenshot"
+
+
+@pytest.fixture
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setitem(conftest.report_options, "report_path", str(tmp_path / "report.html"))
+    monkeypatch.setitem(conftest.report_options, "spool_threshold", 64)
+    return tmp_path / "report-spool"
+
+
+def _steps(lines):
+    return [{"keyword": "Given", "name": "a step", "status": "passed", "logs": [[0.0, "INFO", f"line {i}"]
+                                                                                 for i in range(lines)]}]
+
+
+def test_screenshot_and_large_logs_travel_as_file_names(spool):
+    steps, logs_spool, screenshot, screenshot_spool = conftest._spool_payload(_steps(20),
+                                                                              base64.b64encode(PNG).decode())
+
+    assert screenshot is None and steps[0]["logs"] == []
+    assert (spool / screenshot_spool).read_bytes() == PNG
+    assert (spool / logs_spool).exists()
+
+
+def test_small_logs_stay_inline(spool):
+    steps, logs_spool, screenshot, screenshot_spool = conftest._spool_payload(_steps(1), None)
+
+    assert logs_spool is None and screenshot_spool is None
+    assert steps == _steps(1)
+    assert not spool.exists()
+
+
+def test_report_reads_the_spooled_parts_back(spool):
+    steps, logs_spool, _, screenshot_spool = conftest._spool_payload(_steps(20), base64.b64encode(PNG).decode())
+    session = fake_session([fake_report(outcome="failed", longrepr="E   boom", steps=steps,
+                                        extra_logs_spool=logs_spool, extra_screenshot_spool=screenshot_spool)])
+    scenario = session.sorted_features()[0][1]["scenarios"][0]
+
+    row = dict(zip(conftest.SCENARIO_FIELDS, conftest._scenario_row(0, scenario)))
+    assert row["screenshot"] == f"data:image/png;base64,{base64.b64encode(PNG).decode()}"
+    logs = row["steps"][0][conftest.STEP_FIELDS.index("logs")]
+    assert len(logs) == 20 and logs[-1].endswith(" - INFO - line 19")
@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+
+import conftest
+
+
+@pytest.fixture
+def capture():
+    handler = conftest.StepLogHandler(capacity=3)
+    logger = logging.getLogger("tests.report.step_logs")
+    logger.addHandler(handler)
+    logger.propagate = False
+    yield handler, logger
+    logger.removeHandler(handler)
+
+
+def _messages(entries):
+    return [message for _, _, message in entries]
+
+
+def test_logs_outside_steps_are_dropped(capture):
+    handler, logger = capture
+    logger.info("before")
+    handler.begin_step("a")
+    logger.info("inside")
+    assert _messages(handler.end_step("a")[0]) == ["inside"]
+    logger.info("after")
+    assert handler.end_step("a") == ([], 0)
+
+
+def test_buffer_keeps_the_latest_lines_and_counts_the_rest(capture):
+    handler, logger = capture
+    handler.begin_step("a")
+    for i in range(5):
+        logger.warning("line %d", i)
+    entries, elided = handler.end_step("a")
+
+    assert _messages(entries) == ["line 2", "line 3", "line 4"]
+    assert elided == 2
+    assert entries[0][1] == "WARNING"
+    step = {"logs": entries, "logs_elided": elided}
+    assert conftest._format_step_logs(step)[0] == "... 2 lines elided ..."
+    assert conftest._format_step_logs(step)[1].endswith(" - WARNING - line 2")
+
+
+def test_messages_are_formatted_only_when_rendered(capture):
+    handler, _ = capture
+
+    class Lazy:
+        formatted = 0
+
+        def __str__(self):
+            Lazy.formatted += 1
+            return "lazy"
+
+    handler.begin_step("a")
+    handler.handle(logging.LogRecord("app", logging.INFO, __file__, 1, "%s", (Lazy(),), None))
+    # 处理器只保存 LogRecord，emit 时不调用 Formatter
+    assert Lazy.formatted == 0
+    assert _messages(handler.end_step("a")[0]) == ["lazy"]
+
+
+def test_unfinished_step_does_not_leak_into_the_next_test(capture):
+    handler, logger = capture
+    handler.begin_step("a")
+    logger.info("from a")
+    # a 的步骤异常退出，没有调用 end_step
+    handler.begin_step("b")
+    logger.info("from b")
+
+    assert _messages(handler.end_step("b")[0]) == ["from b"]
+    assert handler.end_step("a") == ([], 0)
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+import conftest
+from report_factory import fake_report, fake_session
+
+NODEID = "tests/step_defs/test_login.py::test_steps"
+
+
+@pytest.fixture
+def bdd_request():
+    node = SimpleNamespace(nodeid=NODEID)
+    yield SimpleNamespace(node=node)
+    conftest.step_execution_cache.pop(NODEID, None)
+
+
+def _run_step(request, name, error=None):
+    step = SimpleNamespace(keyword="Given", name=name)
+    conftest.pytest_bdd_before_step(request, None, None, step, None)
+    if error is None:
+        conftest.pytest_bdd_after_step(request, None, None, step, None, {})
+    else:
+        conftest.pytest_bdd_step_error(request, None, None, step, None, {}, error)
+
+
+def test_steps_record_offset_and_duration(bdd_request):
+    conftest.pytest_bdd_before_scenario(bdd_request, None, None)
+    _run_step(bdd_request, "I open the login page")
+    _run_step(bdd_request, "I submit the form", error=AssertionError("no button"))
+
+    first, second = conftest.step_execution_cache[NODEID]
+    assert first["status"] == "passed" and second["status"] == "failed"
+    assert second["error"] == "no button"
+    assert 0 <= first["start"] <= second["start"]
+    assert first["duration"] >= 0 and second["duration"] >= 0
+
+
+def _step(name, duration, start=0.0):
+    return {"keyword": "Given", "name": name, "status": "passed", "start": start, "duration": duration, "logs": []}
+
+
+def test_teardown_error_does_not_count_the_steps_twice():
+    steps = [_step("login", 1.0), _step("search", 2.0, start=1.0)]
+    session = fake_session([
+        fake_report("test_a", outcome="failed", longrepr="AssertionError", steps=steps),
+        fake_report("test_a", when="teardown", outcome="failed", longrepr="RuntimeError", steps=steps),
+    ])
+
+    assert session.step_stats == {"login": [1, 1.0, 1.0], "search": [1, 2.0, 2.0]}
+
+
+def test_slowest_steps_are_ordered_by_total_time():
+    session = fake_session([
+        fake_report("test_a", steps=[_step("login", 1.0), _step("search", 0.5)]),
+        fake_report("test_b", steps=[_step("login", 3.0), _step("search", 0.5)]),
+    ])
+
+    slowest = session.slowest_steps()
+    assert [s["name"] for s in slowest] == ["login", "search"]
+    assert slowest[0] == {"name": "login", "count": 2, "total": 4.0, "avg": 2.0, "max": 3.0}
+
+
+def test_report_rows_carry_step_timing():
+    row = conftest._scenario_row(0, fake_session([fake_report(steps=[_step("login", 1.25, start=0.5)])])
+                                 .features["1.1. Login"]["scenarios"][0])
+    step = row[conftest.SCENARIO_FIELDS.index("steps")][0]
+    assert step[conftest.STEP_FIELDS.index("start")] == 0.5
+    assert step[conftest.STEP_FIELDS.index("duration")] == 1.25
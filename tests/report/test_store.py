@@ -0,0 +1,52 @@
+import conftest
+from report_factory import fake_report, fake_session, report_data
+
+
+def _reports():
+    statuses = ["passed", "failed", "skipped", "passed"]
+    return [fake_report(f"test_{i:02d}", feature=f"{i % 3 + 1}.1. Feature {i % 3}", outcome=statuses[i % 4],
+                        longrepr="E   AssertionError: boom" if statuses[i % 4] == "failed" else None,
+                        duration=i / 10, markers=("smoke",) if i % 2 else ())
+            for i in range(24)]
+
+
+def _counts(session):
+    return {key: getattr(session, key) for key in ("total", "passed", "failed", "error", "skipped", "feature_total",
+                                                   "feature_passed", "feature_failed", "feature_skipped")}
+
+
+def test_sqlite_store_matches_memory_mode(tmp_path):
+    memory = fake_session(_reports())
+    stored = fake_session(_reports(), db_path=str(tmp_path / "results.sqlite"))
+
+    assert _counts(stored) == _counts(memory)
+    assert stored.all_markers == memory.all_markers
+    assert len(stored.traces) == len(memory.traces) == 1
+    memory_features = memory.sorted_features()
+    stored_features = stored.sorted_features()
+    assert [(name, f["stats"], f["status"]) for name, f in stored_features] == \
+        [(name, f["stats"], f["status"]) for name, f in memory_features]
+    assert [[s["name"] for s in f["scenarios"]] for _, f in stored_features] == \
+        [[s["name"] for s in f["scenarios"]] for _, f in memory_features]
+
+
+def test_sqlite_store_renders_the_same_report(tmp_path, monkeypatch):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    conftest.generate_html_report(fake_session(_reports()), output_path=str(output))
+    memory = report_data(output.read_text(encoding="utf-8"))
+
+    conftest.generate_html_report(fake_session(_reports(), db_path=str(tmp_path / "results.sqlite")),
+                                  output_path=str(output))
+
+    assert report_data(output.read_text(encoding="utf-8")) == memory
+
+
+def test_scenarios_are_read_back_from_the_database(tmp_path):
+    stored = fake_session(_reports(), db_path=str(tmp_path / "results.sqlite"))
+    memory = fake_session(_reports())
+    _, feature = stored.sorted_features()[0]
+
+    # 内存里不保留场景，按 Feature 从 SQLite 逐条读出
+    assert isinstance(feature["scenarios"], conftest._StoredScenarios)
+    assert list(feature["scenarios"]) == memory.sorted_features()[0][1]["scenarios"]
@@ -0,0 +1,41 @@
+import conftest
+from report_factory import fake_report, fake_session, report_data
+
+
+def _render(tmp_path, monkeypatch, count):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    session = fake_session([fake_report(f"test_{i:04d}", feature=f"{i % 3 + 1}.1. Feature {i % 3}",
+                                        markers=("smoke",) if i % 2 else (), duration=i / 100)
+                            for i in range(count)])
+    conftest.generate_html_report(session, output_path=str(output))
+    return output.read_text(encoding="utf-8")
+
+
+def _markup(html):
+    # 去掉数据岛后的页面结构
+    start = html.index('<script type="application/json" id="report-data">')
+    return html[:start] + html[html.index("</script>", start):]
+
+
+def test_scenarios_are_rows_of_the_data_island(tmp_path, monkeypatch):
+    data = report_data(_render(tmp_path, monkeypatch, 6))
+
+    assert data["fields"] == list(conftest.SCENARIO_FIELDS)
+    assert [f["name"] for f in data["features"]] == ["1.1. Feature 0", "2.1. Feature 1", "3.1. Feature 2"]
+    row = dict(zip(data["fields"], data["scenarios"][1]))
+    assert row["feature"] == 0
+    assert row["name"] == "test_0003"
+    assert row["nodeid"] == "tests/step_defs/test_login.py::test_0003"
+    assert row["status"] == "passed"
+    # markers 编码为 all_markers 的位图
+    assert data["markers"] == ["smoke"] and row["markers"] == [1]
+
+
+def test_page_markup_does_not_grow_with_the_scenario_count(tmp_path, monkeypatch):
+    small = _markup(_render(tmp_path, monkeypatch, 50))
+    large = _markup(_render(tmp_path, monkeypatch, 2000))
+
+    # 表格行由页面按数据岛虚拟渲染，服务端只输出固定长度的 Slowest 表
+    assert large.count("test_login.py::") == small.count("test_login.py::") == 20
+    assert abs(len(large) - len(small)) < 1000
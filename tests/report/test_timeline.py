@@ -0,0 +1,47 @@
+import conftest
+from report_factory import fake_report
+
+
+def _run(session, name, worker, start, call, outcome="passed"):
+    # setup 0.5s，call 为给定时长，没有 teardown 耗时
+    session.record_phase(fake_report(name, when="setup", extra_phase=[start, start + 0.5], extra_worker=worker))
+    session.record_phase(fake_report(name, outcome=outcome, extra_phase=[start + 0.5, start + 0.5 + call],
+                                     extra_worker=worker))
+
+
+def test_timeline_entries_are_grouped_by_worker():
+    session = conftest.TestSessionReport()
+    _run(session, "test_c", "gw10", 100.0, 1.0)
+    _run(session, "test_b", "gw2", 102.0, 2.0, outcome="failed")
+    _run(session, "test_a", "gw2", 100.0, 1.0)
+
+    island, _ = session.timeline_data()
+
+    # gw2 排在 gw10 之前，同一 Worker 内按开始时间
+    assert island["workers"] == ["gw2", "gw10"]
+    assert island["entries"] == [
+        [0, 0.0, 0.5, 1.0, 0, "passed", "tests/step_defs/test_login.py::test_a"],
+        [0, 2.0, 0.5, 2.0, 0, "failed", "tests/step_defs/test_login.py::test_b"],
+        [1, 0.0, 0.5, 1.0, 0, "passed", "tests/step_defs/test_login.py::test_c"],
+    ]
+    assert island["span"] == 4.5
+
+
+def test_worker_summary_exposes_idle_time_and_lag():
+    session = conftest.TestSessionReport()
+    _run(session, "test_c", "gw10", 100.0, 1.0)
+    _run(session, "test_b", "gw2", 102.0, 2.0)
+    _run(session, "test_a", "gw2", 100.0, 1.0)
+
+    _, workers = session.timeline_data()
+
+    assert workers == [
+        {"name": "gw2", "tests": 2, "busy": 4.0, "idle": 0.5, "finished": 4.5, "lag": 0.0},
+        {"name": "gw10", "tests": 1, "busy": 1.5, "idle": 0.0, "finished": 1.5, "lag": 3.0},
+    ]
+
+
+def test_no_timeline_without_phase_timings():
+    session = conftest.TestSessionReport()
+    session.record_phase(fake_report())
+    assert session.timeline_data() == (None, [])
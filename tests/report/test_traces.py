@@ -0,0 +1,89 @@
+import pytest
+
+import conftest
+from report_factory import fake_report, fake_session, report_data
+
+TRACE = """page = <Page object at 0x7f3a2c1d9e50>
+
+    def test_sorted(page):
+>       assert prices == sorted(prices)
+E       AssertionError: test_sorted[chrome-1] price mismatch in /tmp/pytest-of-ci/pytest-12/test_sorted0/prices.json at 10:15:02.331
+"""
+
+
+def _variant(address, run, param, clock):
+    return (TRACE.replace("0x7f3a2c1d9e50", address).replace("pytest-12/test_sorted0", run)
+            .replace("[chrome-1]", f"[{param}]").replace("10:15:02.331", clock))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def db_path(request, tmp_path):
+    return str(tmp_path / "results.sqlite") if request.param == "sqlite" else None
+
+
+def test_traces_differing_only_in_run_noise_are_stored_once(db_path):
+    session = fake_session([
+        fake_report("test_a", outcome="failed", longrepr=TRACE),
+        fake_report("test_b", outcome="failed", longrepr=_variant("0x10", "pytest-13/test_sorted1", "chrome-1",
+                                                                  "11:00:00")),
+    ], db_path=db_path)
+
+    assert len(session.traces) == 1
+    assert list(session.traces) == [TRACE]
+
+
+def test_parametrize_ids_keep_their_own_trace_in_one_cluster(db_path):
+    firefox = _variant("0x10", "pytest-13/test_sorted1", "firefox-2", "11:00:00.120")
+    session = fake_session([
+        fake_report("test_a", outcome="failed", longrepr=TRACE),
+        fake_report("test_b", outcome="failed", longrepr=firefox),
+    ], db_path=db_path)
+
+    # 每个场景显示自己的参数化 id，归类时仍是同一个失败
+    assert list(session.traces) == [TRACE, firefox]
+    clusters = session.sorted_clusters()
+    assert [c["count"] for c in clusters] == [2]
+    assert [e["name"] for e in clusters[0]["examples"]] == ["test_a", "test_b"]
+
+
+def test_different_failures_are_stored_separately_but_clustered(db_path):
+    other = TRACE.replace("price mismatch", "price mismatch at 3")
+    session = fake_session([
+        fake_report("test_a", outcome="failed", longrepr=TRACE.replace("price mismatch", "price mismatch at 2")),
+        fake_report("test_b", outcome="failed", longrepr=other),
+        fake_report("test_c", outcome="failed", longrepr="E   KeyError: 'sku'"),
+    ], db_path=db_path)
+
+    assert len(session.traces) == 3
+    clusters = session.sorted_clusters()
+    assert [c["count"] for c in clusters] == [2, 1]
+    assert clusters[0]["summary"].startswith("AssertionError: test_sorted[chrome-1] price mismatch at")
+    assert [e["name"] for e in clusters[0]["examples"]] == ["test_a", "test_b"]
+
+
+def test_sqlite_mode_keeps_trace_text_out_of_memory(tmp_path):
+    session = fake_session([fake_report("test_a", outcome="failed", longrepr=TRACE)],
+                           db_path=str(tmp_path / "results.sqlite"))
+
+    assert not isinstance(session.traces, list)
+    assert session._trace_ids == {}
+    assert session.traces[0] == TRACE
+    session.store.close()
+
+
+def test_report_rows_reference_the_shared_trace(tmp_path, monkeypatch):
+    output = tmp_path / "report.html"
+    monkeypatch.setitem(conftest.report_options, "report_path", str(output))
+    firefox = _variant("0x10", "pytest-13/test_sorted1", "firefox-2", "11:00:00.120")
+    session = fake_session([
+        fake_report("test_a", outcome="failed", longrepr=TRACE),
+        fake_report("test_b", outcome="failed", longrepr=_variant("0x20", "pytest-14/test_sorted2", "chrome-1",
+                                                                  "12:00:00")),
+        fake_report("test_c", outcome="failed", longrepr=firefox),
+    ])
+    conftest.generate_html_report(session, output_path=str(output))
+
+    data = report_data(output.read_text(encoding="utf-8"))
+    assert data["traces"] == [TRACE, firefox]
+    trace_field = data["fields"].index("trace")
+    assert [row[trace_field] for row in data["scenarios"]] == [0, 0, 1]